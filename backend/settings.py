@@ -42,11 +42,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'inventory',
-    'cloudinary',
+    # 'cloudinary' (template tags / CloudinaryField) is not used and pulls in
+    # requests+urllib3 at startup; the storage backend imports it lazily on first upload.
     'cloudinary_storage',
 ]
 
 MIDDLEWARE = [
+    'inventory.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,9 +64,33 @@ CORS_ALLOW_ALL_ORIGINS = True
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # token buckets for the endpoints the mobile app polls (inventory/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'attendance': '60/min',
+        'assigned_items': '60/min',
+        'usage_history': '60/min',
+        'dashboard': '60/min',
+    },
 }
 
+# holds the throttle buckets and request-coalescing locks (inventory/throttling.py);
+# set REDIS_URL to share them between worker processes and hosts
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'inventory',
+        }
+    }
+
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
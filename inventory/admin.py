@@ -1,7 +1,363 @@
 # E:\study\worker_inventory\worker_inventory_backend\inventory\admin.py
-from django.contrib import admin
-from .models import InventoryItem, AssignedItem, UsageLog
+from django import forms
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.http import HttpResponseRedirect
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-admin.site.register(InventoryItem)
-admin.site.register(AssignedItem)
-admin.site.register(UsageLog)
+from . import audit
+from .assignments import assign_item
+from .dashboard import add_log, rebuild_summaries, record_location
+from .errors import InventoryError
+from .models import (
+    InventoryItem, AssignedItem, UsageLog, CourierShipment, CourierItem,
+    WorkerLocation, Attendance, AttendanceMonthlySummary, WorkerItemSummary, WorkerSummary,
+    Task, AuditLog
+)
+from .stock import approve_usage
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    On Postgres, use the planner's row estimate instead of COUNT(*) for large
+    unfiltered changelists; small or filtered lists still get an exact count.
+    """
+    ESTIMATE_ABOVE = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor == 'postgresql' and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.ESTIMATE_ABOVE:
+                return row[0]
+        return super().count
+
+
+class SaveFailureMixin:
+    """
+    Lets save_model() refuse a save it can only check under a row lock: call
+    save_failed() and the admin returns to the form with the error instead
+    of reporting success.
+    """
+    def save_failed(self, request, message):
+        request._save_failed = True
+        messages.error(request, f"Not saved: {message}")
+
+    def response_add(self, request, obj, post_url_continue=None):
+        if getattr(request, '_save_failed', False):
+            return HttpResponseRedirect(request.get_full_path())
+        return super().response_add(request, obj, post_url_continue)
+
+    def response_change(self, request, obj):
+        if getattr(request, '_save_failed', False):
+            return HttpResponseRedirect(request.get_full_path())
+        return super().response_change(request, obj)
+
+
+class InventoryItemAdminForm(forms.ModelForm):
+    class Meta:
+        model = InventoryItem
+        fields = '__all__'
+
+    def clean_total_quantity(self):
+        total = self.cleaned_data['total_quantity']
+        if total < self.instance.reserved_quantity:
+            raise forms.ValidationError(
+                f"Cannot go below the {self.instance.reserved_quantity} assigned to workers."
+            )
+        return total
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(SaveFailureMixin, admin.ModelAdmin):
+    form = InventoryItemAdminForm
+    list_display = ('name', 'total_quantity', 'reserved_quantity', 'available_quantity')
+    search_fields = ('name',)
+    ordering = ('name',)
+    readonly_fields = ('reserved_quantity',)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            with transaction.atomic():
+                super().save_model(request, obj, form, change)
+                audit.record(request, 'stock.create', item=obj, after=obj.total_quantity, critical=True)
+            return
+
+        # reserved_quantity is maintained with F() updates: re-check it under the
+        # row lock and never write back the value the form was loaded with
+        with transaction.atomic():
+            current = InventoryItem.objects.select_for_update().get(pk=obj.pk)
+            if obj.total_quantity < current.reserved_quantity:
+                self.save_failed(request, f"cannot go below the {current.reserved_quantity} assigned to workers")
+                return
+            obj.reserved_quantity = current.reserved_quantity
+            obj.save(update_fields=['name', 'total_quantity', 'reorder_threshold_days'])
+            audit.record(request, 'stock.update', item=obj, before=current.total_quantity,
+                         after=obj.total_quantity, critical=True)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            audit.record(request, 'stock.delete', item=obj, before=obj.total_quantity, critical=True)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+
+class AssignedItemAdminForm(forms.ModelForm):
+    class Meta:
+        model = AssignedItem
+        fields = '__all__'
+
+    def clean(self):
+        data = super().clean()
+        item = data.get('item') or (self.instance.item if self.instance.pk else None)
+        qty = data.get('assigned_quantity')
+        if item is None or qty is None:
+            return data
+
+        if qty < 0:
+            raise forms.ValidationError("Quantity cannot be negative.")
+        current = self.instance.assigned_quantity if self.instance.pk else 0
+        if qty - current > item.available_quantity:
+            raise forms.ValidationError(
+                f"Only {item.available_quantity} more {item.name} available to assign."
+            )
+        return data
+
+
+@admin.register(AssignedItem)
+class AssignedItemAdmin(SaveFailureMixin, admin.ModelAdmin):
+    """Saves and deletes go through assign_item so reserved stock stays in sync"""
+    form = AssignedItemAdminForm
+    list_display = ('worker', 'item', 'assigned_quantity')
+    list_select_related = ('worker', 'item')
+    search_fields = ('worker__username', 'item__name')
+    raw_id_fields = ('worker', 'item')
+
+    def get_readonly_fields(self, request, obj=None):
+        return ('worker', 'item') if obj else ()
+
+    def save_model(self, request, obj, form, change):
+        try:
+            assigned = assign_item(obj.worker, obj.item, obj.assigned_quantity)
+        except InventoryError as e:
+            # stock changed since the form was validated
+            self.save_failed(request, e.message)
+            return
+        obj.pk = assigned.pk
+        audit.record(request, 'assign', item=obj.item, worker=obj.worker,
+                     before=assigned.previous_quantity, after=assigned.assigned_quantity)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            assigned = assign_item(obj.worker, obj.item, 0)
+            obj.delete()
+            audit.record(request, 'assign', item=obj.item, worker=obj.worker,
+                         before=assigned.previous_quantity, after=0, deleted=True)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset.select_related('worker', 'item'):
+            self.delete_model(request, obj)
+
+
+@admin.register(UsageLog)
+class UsageLogAdmin(admin.ModelAdmin):
+    list_display = ('id', 'worker', 'item', 'quantity_used', 'is_approved', 'risk_score', 'timestamp')
+    list_select_related = ('worker', 'item')
+    # no FK filters: the sidebar would list every item on each page load
+    list_filter = ('is_approved', 'photo_duplicate', 'timestamp')
+    search_fields = ('worker__username', 'item__name')
+    ordering = ('-timestamp',)
+    raw_id_fields = ('worker', 'item')
+    # approval must go through the action so stock is deducted
+    readonly_fields = ('is_approved', 'approved_at', 'risk_score', 'risk_reasons',
+                       'photo_fingerprint', 'photo_duplicate', 'timestamp')
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = ['approve_selected']
+
+    def get_readonly_fields(self, request, obj=None):
+        # an approved log has already been deducted from stock and the assignment
+        if obj is not None and obj.is_approved:
+            return self.readonly_fields + ('worker', 'item', 'quantity_used')
+        return self.readonly_fields
+
+    # keep the dashboard's per-worker usage totals in step with admin edits
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                add_log(UsageLog.objects.select_for_update().get(pk=obj.pk), sign=-1)
+            super().save_model(request, obj, form, change)
+            add_log(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            add_log(obj, sign=-1)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+    @admin.action(description="Approve selected usage (deducts stock)")
+    def approve_selected(self, request, queryset):
+        approved, failed = 0, []
+        for log_id in queryset.filter(is_approved=False).values_list('id', flat=True):
+            try:
+                with transaction.atomic():
+                    result = approve_usage(log_id)
+                    audit.record(
+                        request, 'usage.approve', item=result["item"], worker=result["log"].worker,
+                        before=result["stock_before"], after=result["stock_after"], critical=True,
+                        log_id=log_id, used=result["used"],
+                        assigned_before=result["assigned_before"], assigned_after=result["assigned_after"],
+                    )
+                approved += 1
+            except InventoryError as e:
+                failed.append(f"#{log_id}: {e.message}")
+
+        if approved:
+            self.message_user(request, f"Approved {approved} usage logs.", messages.SUCCESS)
+        if failed:
+            self.message_user(request, "Not approved: " + "; ".join(failed), messages.WARNING)
+
+
+class CourierItemInline(admin.TabularInline):
+    model = CourierItem
+    raw_id_fields = ('item',)
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item')
+
+
+@admin.register(CourierShipment)
+class CourierShipmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'worker', 'status', 'created_at', 'sent_at', 'received_at')
+    list_select_related = ('worker',)
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    raw_id_fields = ('worker',)
+    inlines = [CourierItemInline]
+
+
+@admin.register(WorkerLocation)
+class WorkerLocationAdmin(admin.ModelAdmin):
+    list_display = ('worker', 'latitude', 'longitude', 'timestamp')
+    list_select_related = ('worker',)
+    list_filter = ('timestamp',)
+    search_fields = ('worker__username',)
+    raw_id_fields = ('worker',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    # a new point only moves the dashboard's last location forward; edits and
+    # deletes may uncover an older one, so recompute that worker's summary
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                rebuild_summaries([obj.worker_id])
+            else:
+                record_location(obj.worker_id, obj.latitude, obj.longitude, obj.timestamp)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            rebuild_summaries([obj.worker_id])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            worker_ids = set(queryset.values_list('worker_id', flat=True))
+            super().delete_queryset(request, queryset)
+            rebuild_summaries(worker_ids)
+
+
+@admin.register(Attendance)
+class AttendanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'check_in', 'check_out')
+    list_select_related = ('user',)
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+    ordering = ('-date',)
+    raw_id_fields = ('user',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(AttendanceMonthlySummary)
+class AttendanceMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'days_present', 'worked_seconds')
+    list_select_related = ('user',)
+    list_filter = ('month',)
+    ordering = ('-month',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(WorkerItemSummary)
+class WorkerItemSummaryAdmin(admin.ModelAdmin):
+    list_display = ('worker', 'item', 'pending_quantity', 'approved_quantity')
+    list_select_related = ('worker', 'item')
+    search_fields = ('worker__username', 'item__name')
+    # maintained by the usage paths; fix drift with rebuild_worker_summaries
+    readonly_fields = ('worker', 'item', 'pending_quantity', 'approved_quantity')
+
+
+@admin.register(WorkerSummary)
+class WorkerSummaryAdmin(admin.ModelAdmin):
+    list_display = ('worker', 'month', 'days_present', 'worked_seconds', 'last_location_at')
+    list_select_related = ('worker',)
+    search_fields = ('worker__username',)
+    readonly_fields = ('worker', 'month', 'days_present', 'worked_seconds',
+                       'last_latitude', 'last_longitude', 'last_location_at')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'duration_ms', 'run_after', 'finished_at')
+    list_filter = ('status', 'name')
+    ordering = ('-id',)
+    readonly_fields = ('attempts', 'locked_by', 'locked_at', 'last_error', 'created_at',
+                       'started_at', 'finished_at', 'duration_ms')
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = ['retry_selected']
+
+    @admin.action(description="Retry selected tasks now")
+    def retry_selected(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='pending', attempts=0, run_after=timezone.now(), last_error=''
+        )
+        self.message_user(request, f"Queued {count} tasks.", messages.SUCCESS)
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(admin.ModelAdmin):
+    """Read-only: entries are written by the views and admin actions"""
+    list_display = ('created_at', 'actor_name', 'action', 'item_name', 'worker_id',
+                    'quantity_before', 'quantity_after', 'request_id')
+    list_filter = ('action',)
+    search_fields = ('actor_name', 'item_name', 'request_id')
+    ordering = ('-created_at', '-id')
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,175 @@
+# inventory/analytics.py
+import hashlib
+import heapq
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from .errors import InventoryError
+from .forecasting import CURSOR_NAME, _new_approved_logs
+from .models import InventoryItem, ItemDailyUsage, JobCursor, WorkerDailyUsage
+
+CACHE_TTL = 300  # seconds a report is served from cache
+DEFAULT_DAYS = 30
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+# period -> (SQL truncation of a date column, the same truncation in Python)
+GROUPINGS = {
+    'day': (None, lambda d: d),
+    'week': (TruncWeek, lambda d: d - timedelta(days=d.weekday())),
+    'month': (TruncMonth, lambda d: d.replace(day=1)),
+    'year': (TruncYear, lambda d: d.replace(month=1, day=1)),
+}
+
+
+def parse_params(query):
+    """Validate report query parameters into item_report() keyword arguments"""
+    try:
+        end = date.fromisoformat(query["end"]) if query.get("end") else timezone.localdate()
+        start = (date.fromisoformat(query["start"]) if query.get("start")
+                 else end - timedelta(days=DEFAULT_DAYS - 1))
+    except ValueError:
+        raise InventoryError("start and end must be YYYY-MM-DD dates")
+    if start > end:
+        raise InventoryError("start must not be after end")
+
+    group_by = query.get("group_by") or "day"
+    if group_by not in GROUPINGS:
+        raise InventoryError(f"group_by must be one of: {', '.join(GROUPINGS)}")
+
+    try:
+        item_ids = sorted({int(i) for i in query["item_id"].split(",")}) if query.get("item_id") else None
+        top = int(query.get("top") or DEFAULT_TOP)
+    except ValueError:
+        raise InventoryError("item_id and top must be integers")
+    if not 0 <= top <= MAX_TOP:
+        raise InventoryError(f"top must be between 0 and {MAX_TOP}")
+
+    return {"start": start, "end": end, "group_by": group_by, "item_ids": item_ids, "top": top}
+
+
+def _cache_key(params):
+    fingerprint = json.dumps(params, sort_keys=True, default=str)
+    return "analytics_items_" + hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def item_report(start, end, group_by="day", item_ids=None, top=DEFAULT_TOP, use_cache=True):
+    """
+    Per item: stock, quantity assigned to workers, approved usage per period
+    between `start` and `end` (inclusive) and the `top` consumers in that range.
+    Results are cached for CACHE_TTL seconds per distinct set of arguments.
+    """
+    key = _cache_key([start, end, group_by, item_ids, top])
+    if use_cache:
+        report = cache.get(key)
+        if report is not None:
+            return report
+
+    report = _build_report(start, end, group_by, item_ids, top)
+    cache.set(key, report, CACHE_TTL)
+    return report
+
+
+def _cursor():
+    return JobCursor.objects.filter(name=CURSOR_NAME).values_list('last_timestamp', 'last_id').first()
+
+
+def _consumption(start, end, group_by, item_ids):
+    """
+    ({(item_id, period): qty}, {(item_id, worker_id): qty}) of approved usage.
+    Days already rolled up are read from the daily tables; logs approved since
+    the last rollup are grouped straight from UsageLog.
+    """
+    trunc, to_period = GROUPINGS[group_by]
+    daily = ItemDailyUsage.objects.filter(day__gte=start, day__lte=end)
+    per_worker = WorkerDailyUsage.objects.filter(day__gte=start, day__lte=end)
+    if item_ids is not None:
+        daily = daily.filter(item_id__in=item_ids)
+        per_worker = per_worker.filter(item_id__in=item_ids)
+
+    # a rollup committing between the reads below would count its logs twice
+    # (or not at all), so retry if the cursor moved while we were reading
+    for _ in range(3):
+        before = _cursor()
+        cursor = JobCursor(name=CURSOR_NAME)
+        if before is not None:
+            cursor.last_timestamp, cursor.last_id = before
+
+        periods = {}
+        rows = daily.annotate(period=trunc('day') if trunc else F('day'))
+        for row in rows.values('item_id', 'period').annotate(qty=Sum('quantity')):
+            periods[(row['item_id'], row['period'])] = row['qty']
+
+        consumers = {
+            (row['item_id'], row['worker_id']): row['qty']
+            for row in per_worker.values('item_id', 'worker_id').annotate(qty=Sum('quantity'))
+        }
+
+        tail = _new_approved_logs(cursor).filter(approved_at__date__gte=start, approved_at__date__lte=end)
+        if item_ids is not None:
+            tail = tail.filter(item_id__in=item_ids)
+        for row in (tail.annotate(day=TruncDate('approved_at'))
+                        .values('item_id', 'worker_id', 'day')
+                        .annotate(qty=Sum('quantity_used'))):
+            key = (row['item_id'], to_period(row['day']))
+            periods[key] = periods.get(key, 0) + row['qty']
+            key = (row['item_id'], row['worker_id'])
+            consumers[key] = consumers.get(key, 0) + row['qty']
+
+        if _cursor() == before:
+            break
+    return periods, consumers
+
+
+def _build_report(start, end, group_by, item_ids, top):
+    items = InventoryItem.objects.order_by('name')
+    if item_ids is not None:
+        items = items.filter(id__in=item_ids)
+    items = list(items.values('id', 'name', 'total_quantity', 'reserved_quantity'))
+
+    periods, consumers = _consumption(start, end, group_by, item_ids)
+
+    by_item = {}
+    for (item_id, worker_id), qty in consumers.items():
+        by_item.setdefault(item_id, []).append((qty, worker_id))
+    leaders = {
+        item_id: heapq.nlargest(top, rows, key=lambda r: (r[0], -r[1]))
+        for item_id, rows in by_item.items()
+    }
+    usernames = dict(
+        User.objects.filter(id__in={w for rows in leaders.values() for _, w in rows})
+        .values_list('id', 'username')
+    )
+
+    series = {}
+    for (item_id, period), qty in sorted(periods.items(), key=lambda kv: kv[0][1]):
+        series.setdefault(item_id, []).append({"period": period.isoformat(), "quantity": qty})
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": group_by,
+        "generated_at": timezone.now().isoformat(),
+        "items": [
+            {
+                "item_id": item["id"],
+                "item_name": item["name"],
+                "total_stock": item["total_quantity"],
+                # reserved_quantity is kept equal to the summed assignments
+                "total_assigned": item["reserved_quantity"],
+                "consumed": sum(p["quantity"] for p in series.get(item["id"], [])),
+                "consumed_by_period": series.get(item["id"], []),
+                "top_consumers": [
+                    {"worker_id": worker_id, "username": usernames.get(worker_id), "quantity": qty}
+                    for qty, worker_id in leaders.get(item["id"], [])
+                ],
+            }
+            for item in items
+        ],
+    }
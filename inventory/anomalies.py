@@ -0,0 +1,134 @@
+# inventory/anomalies.py
+import math
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import UsageLog, WorkerLocation, JobCursor, WorkerItemUsageStats, ItemUsageStats
+
+CURSOR_NAME = "usage_anomaly"
+BATCH_SIZE = 5000
+
+MIN_SAMPLES = 5          # history needed before a z-score is trusted
+Z_THRESHOLD = 3.0        # standard deviations above the mean
+FAR_KM = 5.0             # distance from the last known location
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def _z_score(stats, value):
+    """z-score of `value` against the history in `stats`, None if too little history"""
+    if stats is None or stats.count < MIN_SAMPLES:
+        return None
+    mean = stats.total / stats.count
+    var = max(stats.total_sq / stats.count - mean * mean, 0.0)
+    # floor the deviation at one unit so a perfectly regular history
+    # doesn't turn a +1 into an infinite score
+    return (value - mean) / max(math.sqrt(var), 1.0)
+
+
+def _add(stats, value):
+    stats.count += 1
+    stats.total += value
+    stats.total_sq += value * value
+
+
+def _score_batch(logs):
+    pairs = {(log.worker_id, log.item_id) for log in logs}
+    item_ids = {item_id for _, item_id in pairs}
+
+    worker_stats = {
+        (s.worker_id, s.item_id): s
+        for s in WorkerItemUsageStats.objects.filter(
+            worker_id__in={w for w, _ in pairs}, item_id__in=item_ids
+        )
+    }
+    peer_stats = {s.item_id: s for s in ItemUsageStats.objects.filter(item_id__in=item_ids)}
+    existing_worker_stats = list(worker_stats.values())
+    existing_peer_stats = list(peer_stats.values())
+    new_worker_stats, new_peer_stats = [], []
+
+    for log in logs:
+        qty = float(log.quantity_used)
+        reasons = []
+        score = 0.0
+
+        ws = worker_stats.get((log.worker_id, log.item_id))
+        z = _z_score(ws, qty)
+        if z is not None:
+            score = max(score, z)
+            if z >= Z_THRESHOLD:
+                reasons.append("above_worker_norm")
+
+        ps = peer_stats.get(log.item_id)
+        z = _z_score(ps, qty)
+        if z is not None:
+            score = max(score, z)
+            if z >= Z_THRESHOLD:
+                reasons.append("above_peer_norm")
+
+        if None not in (log.latitude, log.longitude, log.last_lat, log.last_lng):
+            km = haversine_km(log.latitude, log.longitude, log.last_lat, log.last_lng)
+            score += km / FAR_KM
+            if km >= FAR_KM:
+                reasons.append("far_from_location")
+
+        log.risk_score = round(score, 3)
+        log.risk_reasons = ",".join(reasons)
+
+        # fold this log into the history only after scoring it
+        if ws is None:
+            ws = WorkerItemUsageStats(worker_id=log.worker_id, item_id=log.item_id)
+            worker_stats[(log.worker_id, log.item_id)] = ws
+            new_worker_stats.append(ws)
+        _add(ws, qty)
+
+        if ps is None:
+            ps = ItemUsageStats(item_id=log.item_id)
+            peer_stats[log.item_id] = ps
+            new_peer_stats.append(ps)
+        _add(ps, qty)
+
+    stat_fields = ['count', 'total', 'total_sq']
+    WorkerItemUsageStats.objects.bulk_create(new_worker_stats, batch_size=1000)
+    WorkerItemUsageStats.objects.bulk_update(existing_worker_stats, stat_fields, batch_size=1000)
+    ItemUsageStats.objects.bulk_create(new_peer_stats, batch_size=1000)
+    ItemUsageStats.objects.bulk_update(existing_peer_stats, stat_fields, batch_size=1000)
+    UsageLog.objects.bulk_update(logs, ['risk_score', 'risk_reasons'], batch_size=1000)
+
+
+def score_new_usage(batch_size=BATCH_SIZE):
+    """
+    Score every UsageLog that has no risk_score yet and fold it into the
+    per-worker and per-item running statistics. Returns the number scored.
+    """
+    last_location = WorkerLocation.objects.filter(
+        worker=OuterRef('worker'), timestamp__lte=OuterRef('timestamp')
+    ).order_by('-timestamp')
+
+    scored = 0
+    while True:
+        with transaction.atomic():
+            # the JobCursor row is only a lock serialising runs; progress is
+            # risk_score itself, since ids are handed out before commit and can
+            # land behind a high-water mark, so the row's last_id is not used
+            JobCursor.objects.select_for_update().get_or_create(name=CURSOR_NAME)
+            logs = list(
+                UsageLog.objects.filter(risk_score__isnull=True)
+                .only('id', 'worker_id', 'item_id', 'quantity_used', 'timestamp', 'latitude', 'longitude')
+                .annotate(
+                    last_lat=Subquery(last_location.values('latitude')[:1]),
+                    last_lng=Subquery(last_location.values('longitude')[:1]),
+                )
+                .order_by('id')[:batch_size]
+            )
+            if not logs:
+                return scored
+
+            _score_batch(logs)
+        scored += len(logs)
@@ -0,0 +1,166 @@
+# inventory/assignments.py
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .errors import InventoryError
+from .models import InventoryItem, AssignedItem
+
+BATCH_SIZE = 2000
+
+
+def expand_matrix(data):
+    """
+    Normalise a bulk assignment request into (member_id, item_id, quantity) rows.
+    Either explicit rows:
+        {"assignments": [{"member_id": 1, "item_id": 2, "quantity": 5}, ...]}
+    or a matrix applying every item row to every member:
+        {"member_ids": [1, 2, 3], "items": [{"item_id": 2, "quantity": 5}, ...]}
+    """
+    if "assignments" in data:
+        rows = data["assignments"]
+        if not isinstance(rows, list):
+            raise InventoryError("assignments must be a list")
+        entries = [(row, {"index": i}) for i, row in enumerate(rows)]
+    else:
+        member_ids, items = data.get("member_ids"), data.get("items")
+        if not isinstance(member_ids, list) or not isinstance(items, list):
+            raise InventoryError("assignments, or member_ids and items, required")
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise InventoryError("items must be objects with item_id and quantity", {"items_index": i})
+        # errors point at the offending entry of `items`, not the expanded row
+        entries = [
+            ({"member_id": member_id, **item}, {"items_index": i})
+            for member_id in member_ids
+            for i, item in enumerate(items)
+        ]
+
+    parsed = []
+    for entry, where in entries:
+        try:
+            row = (int(entry["member_id"]), int(entry["item_id"]), int(entry["quantity"]))
+        except (KeyError, TypeError, ValueError):
+            raise InventoryError("member_id, item_id and integer quantity required", where)
+        if row[2] < 0:
+            raise InventoryError("quantity cannot be negative", where)
+        parsed.append(row)
+    return parsed
+
+
+def assign_item(member, item, quantity):
+    """
+    Set one member's assigned_quantity for `item`, moving the difference
+    into/out of the item's reserved_quantity. Returns the AssignedItem, with
+    the quantity it replaced in `previous_quantity`.
+    """
+    if quantity < 0:
+        raise InventoryError("quantity cannot be negative")
+
+    with transaction.atomic():
+        # items are always locked before their assignments (see bulk_assign)
+        item = InventoryItem.objects.select_for_update().get(id=item.id)
+        assigned, _ = AssignedItem.objects.get_or_create(worker=member, item=item)
+
+        delta = quantity - assigned.assigned_quantity
+        if delta > item.available_quantity:
+            raise InventoryError("Not enough stock available", {
+                "item_id": item.id,
+                "available": item.available_quantity,
+                "requested": delta,
+            })
+
+        if delta:
+            AssignedItem.objects.filter(id=assigned.id).update(assigned_quantity=quantity)
+            InventoryItem.objects.filter(id=item.id).update(
+                reserved_quantity=F('reserved_quantity') + delta
+            )
+        assigned.previous_quantity = assigned.assigned_quantity
+        assigned.assigned_quantity = quantity
+    return assigned
+
+
+def bulk_assign(rows):
+    """
+    Set assigned_quantity for many (member, item) pairs in one transaction with
+    a single upsert on the (worker, item) constraint, and move the net change
+    per item into reserved_quantity. Fails without writing anything if any
+    item would end up with more reserved than in stock.
+    Returns {"assigned": pairs written, "reserved": [(item, before, after), ...]}
+    listing the items whose reserved_quantity changed.
+    """
+    quantities = {}
+    for member_id, item_id, qty in rows:
+        if (member_id, item_id) in quantities:
+            raise InventoryError("duplicate member/item pair",
+                                 {"member_id": member_id, "item_id": item_id})
+        quantities[(member_id, item_id)] = qty
+    if not quantities:
+        return {"assigned": 0, "reserved": []}
+
+    member_ids = {m for m, _ in quantities}
+    item_ids = {i for _, i in quantities}
+
+    with transaction.atomic():
+        found = set(User.objects.filter(id__in=member_ids, is_staff=False).values_list('id', flat=True))
+        if found != member_ids:
+            raise InventoryError("Member not found", {"member_ids": sorted(member_ids - found)})
+
+        # lock the items so concurrent assignments see the same reserved totals
+        items = {
+            item.id: item
+            for item in InventoryItem.objects.select_for_update().filter(id__in=item_ids)
+            .only('id', 'name', 'total_quantity', 'reserved_quantity')
+        }
+        if len(items) != len(item_ids):
+            raise InventoryError("Item not found", {"item_ids": sorted(item_ids - set(items))})
+
+        deltas = _reservation_deltas(quantities, member_ids, item_ids)
+        over = [
+            {"item_id": item_id, "available": items[item_id].available_quantity, "requested": delta}
+            for item_id, delta in sorted(deltas.items())
+            if delta > items[item_id].available_quantity
+        ]
+        if over:
+            raise InventoryError("Not enough stock available", {"items": over})
+
+        AssignedItem.objects.bulk_create(
+            [AssignedItem(worker_id=m, item_id=i, assigned_quantity=q) for (m, i), q in quantities.items()],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['worker', 'item'],
+            update_fields=['assigned_quantity'],
+        )
+
+        changed = {item_id: delta for item_id, delta in deltas.items() if delta}
+        if changed:
+            InventoryItem.objects.filter(id__in=changed).update(
+                reserved_quantity=F('reserved_quantity') + Case(
+                    *[When(id=item_id, then=Value(delta)) for item_id, delta in changed.items()],
+                    default=Value(0),
+                )
+            )
+    return {
+        "assigned": len(quantities),
+        "reserved": [
+            (items[item_id], items[item_id].reserved_quantity, items[item_id].reserved_quantity + delta)
+            for item_id, delta in sorted(changed.items())
+        ],
+    }
+
+
+def _reservation_deltas(quantities, member_ids, item_ids):
+    """Net change in reserved_quantity per item if `quantities` were written"""
+    deltas = defaultdict(int)
+    for (_, item_id), qty in quantities.items():
+        deltas[item_id] += qty
+
+    existing = AssignedItem.objects.filter(
+        worker_id__in=member_ids, item_id__in=item_ids
+    ).values_list('worker_id', 'item_id', 'assigned_quantity')
+    for worker_id, item_id, qty in existing:
+        if (worker_id, item_id) in quantities:
+            deltas[item_id] -= qty
+    return deltas
@@ -0,0 +1,81 @@
+# inventory/attendance_archive.py
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from .models import Attendance, AttendanceMonthlySummary
+
+
+def _month_start(d, months_back=0):
+    year, month = d.year, d.month - months_back
+    while month < 1:
+        month += 12
+        year -= 1
+    return date(year, month, 1)
+
+
+def _next_month(d):
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_month(month):
+    """
+    Fold every Attendance row of `month` into AttendanceMonthlySummary and
+    delete the rows, in one transaction. Re-running adds late rows to the
+    existing summaries. Returns the number of rows archived.
+    """
+    rows = Attendance.objects.filter(date__gte=month, date__lt=_next_month(month))
+
+    with transaction.atomic():
+        totals = list(
+            rows.values('user_id').annotate(
+                present=Count('id', filter=Q(check_in__isnull=False)),
+                worked=Sum(
+                    ExpressionWrapper(F('check_out') - F('check_in'), output_field=DurationField()),
+                    filter=Q(check_in__isnull=False, check_out__isnull=False),
+                ),
+            )
+        )
+        if not totals:
+            return 0
+
+        existing = {
+            s.user_id: s
+            for s in AttendanceMonthlySummary.objects.select_for_update().filter(
+                month=month, user_id__in=[t['user_id'] for t in totals]
+            )
+        }
+        to_create, to_update = [], []
+        for t in totals:
+            seconds = int(t['worked'].total_seconds()) if t['worked'] else 0
+            summary = existing.get(t['user_id'])
+            if summary is None:
+                to_create.append(AttendanceMonthlySummary(
+                    user_id=t['user_id'], month=month,
+                    days_present=t['present'], worked_seconds=seconds,
+                ))
+            else:
+                summary.days_present += t['present']
+                summary.worked_seconds += seconds
+                to_update.append(summary)
+
+        AttendanceMonthlySummary.objects.bulk_create(to_create, batch_size=1000)
+        AttendanceMonthlySummary.objects.bulk_update(
+            to_update, ['days_present', 'worked_seconds'], batch_size=1000
+        )
+        deleted, _ = rows.delete()
+    return deleted
+
+
+def closed_months(keep_months=1):
+    """First days of the months with Attendance rows older than the last `keep_months` months"""
+    cutoff = _month_start(timezone.localdate(), keep_months - 1)
+    oldest = Attendance.objects.filter(date__lt=cutoff).order_by('date').values_list('date', flat=True).first()
+    months = []
+    month = _month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = _next_month(month)
+    return months
@@ -0,0 +1,177 @@
+# inventory/audit.py
+import atexit
+import base64
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .errors import InventoryError
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 200        # buffered entries that trigger an immediate flush
+FLUSH_INTERVAL = 5      # seconds between background flushes
+MAX_BUFFER = 10_000     # entries kept for retry while the database is unavailable
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+_buffer = []
+_lock = threading.Lock()
+_flusher = None
+
+
+def entry(request, action, item=None, worker=None, before=None, after=None, **details):
+    """An unsaved AuditLog for `action` performed by the user behind `request` (may be None)"""
+    user = getattr(request, 'user', None)
+    actor = user if user is not None and user.is_authenticated else None
+    return AuditLog(
+        actor=actor,
+        actor_name=actor.username if actor else '',
+        action=action,
+        item=item,
+        item_name=item.name if item else '',
+        worker=worker,
+        quantity_before=before,
+        quantity_after=after,
+        details=details,
+        request_id=getattr(request, 'request_id', ''),
+        created_at=timezone.now(),
+    )
+
+
+def record(request, action, critical=False, **kwargs):
+    """
+    Audit one action. Critical entries are written immediately, inside the
+    caller's transaction, so they commit or roll back with the change.
+    Others are buffered once the surrounding transaction commits and
+    written in batches by flush().
+    """
+    log = entry(request, action, **kwargs)
+    if critical:
+        log.save()
+    else:
+        buffer([log])
+    return log
+
+
+def buffer(logs):
+    """Queue unsaved AuditLogs for the next batch write, once the current transaction commits"""
+    if logs:
+        transaction.on_commit(lambda: _append(logs))
+
+
+def _append(logs):
+    global _flusher
+    with _lock:
+        _buffer.extend(logs)
+        full = len(_buffer) >= FLUSH_SIZE
+        if _flusher is None:
+            # started on first use so importing this module has no side effects
+            _flusher = threading.Thread(target=_flush_periodically, name='audit-flush', daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+    if full:
+        flush()
+
+
+def flush():
+    """Write all buffered entries with one bulk insert. Returns the number written."""
+    with _lock:
+        batch = _buffer[:]
+        _buffer.clear()
+    if not batch:
+        return 0
+
+    try:
+        AuditLog.objects.bulk_create(batch, batch_size=500)
+    except DatabaseError:
+        logger.exception("Writing %d audit entries failed, keeping them for the next flush", len(batch))
+        with _lock:
+            _buffer[:0] = batch[-MAX_BUFFER:]
+            del _buffer[MAX_BUFFER:]
+        return 0
+    return len(batch)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception("Audit flush failed")
+        finally:
+            connection.close()
+
+
+# ---------- QUERY ----------
+
+def _encode_cursor(log):
+    return base64.urlsafe_b64encode(str(log.id).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InventoryError("Invalid cursor")
+
+
+def _parse_moment(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise InventoryError(f"{name} must be an ISO date or datetime")
+        moment = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def search(params):
+    """
+    Audit entries matching `params`, most recently written first (buffered
+    entries are written up to FLUSH_INTERVAL seconds after their created_at,
+    so pages follow ids, not timestamps), one page at a time:
+    action (exact, or a prefix ending in '.' e.g. "stock."), actor (username),
+    item_id, worker_id, request_id, since/until (ISO), limit, cursor (from
+    the previous page). Returns (entries, next_cursor or None).
+    """
+    flush()  # include this process's buffered entries
+
+    logs = AuditLog.objects.all()
+    action = params.get('action')
+    if action:
+        logs = logs.filter(action__startswith=action) if action.endswith('.') else logs.filter(action=action)
+    if params.get('actor'):
+        logs = logs.filter(actor_name=params['actor'])
+    if params.get('request_id'):
+        logs = logs.filter(request_id=params['request_id'])
+    try:
+        if params.get('item_id'):
+            logs = logs.filter(item_id=int(params['item_id']))
+        if params.get('worker_id'):
+            logs = logs.filter(worker_id=int(params['worker_id']))
+        limit = int(params.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        raise InventoryError("item_id, worker_id and limit must be integers")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise InventoryError(f"limit must be between 1 and {MAX_LIMIT}")
+    if params.get('since'):
+        logs = logs.filter(created_at__gte=_parse_moment(params['since'], 'since'))
+    if params.get('until'):
+        logs = logs.filter(created_at__lt=_parse_moment(params['until'], 'until'))
+
+    if params.get('cursor'):
+        logs = logs.filter(id__lt=_decode_cursor(params['cursor']))
+
+    page = list(logs.order_by('-id')[:limit + 1])
+    next_cursor = _encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,233 @@
+# inventory/dashboard.py
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from .models import AssignedItem, Attendance, UsageLog, WorkerItemSummary, WorkerLocation, WorkerSummary
+
+
+def _month_start(d):
+    return d.replace(day=1)
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------- INCREMENTAL UPDATES (called on each write) ----------
+
+def add_usage(worker_id, item_id, pending=0, approved=0):
+    """Add `pending`/`approved` quantities to a worker's totals for one item"""
+    rows = WorkerItemSummary.objects.filter(worker_id=worker_id, item_id=item_id)
+    deltas = {
+        'pending_quantity': F('pending_quantity') + pending,
+        'approved_quantity': F('approved_quantity') + approved,
+    }
+    if rows.update(**deltas):
+        return
+    try:
+        with transaction.atomic():
+            WorkerItemSummary.objects.create(
+                worker_id=worker_id, item_id=item_id,
+                pending_quantity=pending, approved_quantity=approved,
+            )
+    except IntegrityError:
+        # created by a concurrent request between the update and the insert
+        rows.update(**deltas)
+
+
+def add_log(log, sign=1):
+    """Count (`sign`=1) or uncount (-1) a UsageLog in its worker's totals"""
+    qty = sign * log.quantity_used
+    if log.is_approved:
+        add_usage(log.worker_id, log.item_id, approved=qty)
+    else:
+        add_usage(log.worker_id, log.item_id, pending=qty)
+
+
+def record_attendance(worker_id, day, days_present=0, worked_seconds=0, lat=None, lng=None, at=None):
+    """
+    Add a check-in (`days_present`) or check-out (`worked_seconds`) dated `day`
+    to the worker's current-month totals, starting over when a new month
+    begins, and move the last known location to (`lat`, `lng`) if given.
+    """
+    month = _month_start(day)
+    lat, lng = _to_float(lat), _to_float(lng)
+
+    with transaction.atomic():
+        summary, _ = WorkerSummary.objects.select_for_update().get_or_create(
+            worker_id=worker_id, defaults={'month': month}
+        )
+        if summary.month < month:
+            summary.month = month
+            summary.days_present = 0
+            summary.worked_seconds = 0
+        if summary.month == month:
+            summary.days_present += days_present
+            summary.worked_seconds += worked_seconds
+
+        _move_location(summary, lat, lng, at or timezone.now())
+        summary.save()
+
+
+def record_location(worker_id, lat, lng, at):
+    """Move the worker's last known location to (`lat`, `lng`) seen at `at`, unless a later one is known"""
+    lat, lng = _to_float(lat), _to_float(lng)
+    with transaction.atomic():
+        summary, _ = WorkerSummary.objects.select_for_update().get_or_create(
+            worker_id=worker_id, defaults={'month': _month_start(timezone.localdate())}
+        )
+        if _move_location(summary, lat, lng, at):
+            summary.save(update_fields=['last_latitude', 'last_longitude', 'last_location_at'])
+
+
+def _move_location(summary, lat, lng, at):
+    if lat is None or lng is None:
+        return False
+    if summary.last_location_at is not None and at < summary.last_location_at:
+        return False
+    summary.last_latitude, summary.last_longitude, summary.last_location_at = lat, lng, at
+    return True
+
+
+# ---------- READ ----------
+
+def worker_dashboard(worker):
+    """Launch data for the member app: three indexed reads, no per-log scans"""
+    items = {}
+    for a in AssignedItem.objects.filter(worker=worker).select_related('item'):
+        items[a.item_id] = {
+            "item_id": a.item_id,
+            "item_name": a.item.name,
+            "assigned_quantity": a.assigned_quantity,
+            "pending_quantity": 0,
+            "approved_quantity": 0,
+        }
+    for s in WorkerItemSummary.objects.filter(worker=worker).select_related('item'):
+        row = items.setdefault(s.item_id, {
+            "item_id": s.item_id,
+            "item_name": s.item.name,
+            "assigned_quantity": 0,
+        })
+        row["pending_quantity"] = s.pending_quantity
+        row["approved_quantity"] = s.approved_quantity
+
+    month = _month_start(timezone.localdate())
+    summary = WorkerSummary.objects.filter(worker=worker).first()
+    current = summary is not None and summary.month == month
+
+    return {
+        "items": sorted(items.values(), key=lambda r: r["item_name"]),
+        "attendance": {
+            "month": f"{month:%Y-%m}",
+            "days_present": summary.days_present if current else 0,
+            "worked_hours": round(summary.worked_seconds / 3600, 2) if current else 0,
+        },
+        "last_location": {
+            "latitude": summary.last_latitude,
+            "longitude": summary.last_longitude,
+            "timestamp": summary.last_location_at.isoformat(),
+        } if summary is not None and summary.last_location_at else None,
+    }
+
+
+# ---------- REBUILD ----------
+
+def _last_locations(worker_ids):
+    """
+    Most recent (timestamp, lat, lng) per worker from tracked locations and
+    check-ins/outs, the points record_location() and record_attendance() keep
+    """
+    latest = {}
+
+    def offer(worker_id, at, lat, lng):
+        if at is not None and lat is not None and lng is not None:
+            if worker_id not in latest or at > latest[worker_id][0]:
+                latest[worker_id] = (at, lat, lng)
+
+    locations = WorkerLocation.objects.order_by('worker_id', '-timestamp')
+    attendance = Attendance.objects.all()
+    if worker_ids is not None:
+        locations = locations.filter(worker_id__in=worker_ids)
+        attendance = attendance.filter(user_id__in=worker_ids)
+
+    seen = set()
+    for worker_id, at, lat, lng in locations.values_list('worker_id', 'timestamp', 'latitude', 'longitude').iterator():
+        if worker_id not in seen:
+            seen.add(worker_id)
+            offer(worker_id, at, lat, lng)
+
+    for row in attendance.values_list(
+        'user_id', 'check_in', 'check_in_lat', 'check_in_lng',
+        'check_out', 'check_out_lat', 'check_out_lng',
+    ).iterator():
+        offer(row[0], row[1], row[2], row[3])
+        offer(row[0], row[4], row[5], row[6])
+    return latest
+
+
+def rebuild_summaries(worker_ids=None):
+    """
+    Recompute WorkerItemSummary and WorkerSummary from the source tables for
+    `worker_ids` (all workers when None). Returns (item rows, worker rows) written.
+    """
+    month = _month_start(timezone.localdate())
+    workers = User.objects.all()
+    usage = UsageLog.objects.all()
+    attendance = Attendance.objects.filter(date__gte=month)
+    if worker_ids is not None:
+        workers = workers.filter(id__in=worker_ids)
+        usage = usage.filter(worker_id__in=worker_ids)
+        attendance = attendance.filter(user_id__in=worker_ids)
+
+    totals = usage.values('worker_id', 'item_id').annotate(
+        pending=Sum('quantity_used', filter=Q(is_approved=False)),
+        approved=Sum('quantity_used', filter=Q(is_approved=True)),
+    )
+    present = {
+        row['user_id']: row
+        for row in attendance.values('user_id').annotate(
+            days=Count('id', filter=Q(check_in__isnull=False)),
+            worked=Sum(
+                ExpressionWrapper(F('check_out') - F('check_in'), output_field=DurationField()),
+                filter=Q(check_in__isnull=False, check_out__isnull=False),
+            ),
+        )
+    }
+
+    with transaction.atomic():
+        item_rows = [
+            WorkerItemSummary(
+                worker_id=t['worker_id'], item_id=t['item_id'],
+                pending_quantity=t['pending'] or 0, approved_quantity=t['approved'] or 0,
+            )
+            for t in totals
+        ]
+        locations = _last_locations(worker_ids)
+        worker_rows = []
+        for worker_id in workers.values_list('id', flat=True):
+            row = present.get(worker_id)
+            at, lat, lng = locations.get(worker_id, (None, None, None))
+            if row is None and at is None:
+                continue
+            worker_rows.append(WorkerSummary(
+                worker_id=worker_id, month=month,
+                days_present=row['days'] if row else 0,
+                worked_seconds=int(row['worked'].total_seconds()) if row and row['worked'] else 0,
+                last_latitude=lat, last_longitude=lng, last_location_at=at,
+            ))
+
+        stale_items = WorkerItemSummary.objects.all()
+        stale_workers = WorkerSummary.objects.all()
+        if worker_ids is not None:
+            stale_items = stale_items.filter(worker_id__in=worker_ids)
+            stale_workers = stale_workers.filter(worker_id__in=worker_ids)
+        stale_items.delete()
+        stale_workers.delete()
+        WorkerItemSummary.objects.bulk_create(item_rows, batch_size=1000)
+        WorkerSummary.objects.bulk_create(worker_rows, batch_size=1000)
+    return len(item_rows), len(worker_rows)
@@ -0,0 +1,15 @@
+# inventory/errors.py
+from rest_framework.response import Response
+
+
+class InventoryError(ValueError):
+    """An expected failure, reported to the client as {"error": message, **details}"""
+
+    def __init__(self, message, details=None, status=400):
+        super().__init__(message)
+        self.message = message
+        self.details = details or {}
+        self.status = status
+
+    def response(self):
+        return Response({"error": self.message, **self.details}, status=self.status)
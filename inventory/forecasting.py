@@ -0,0 +1,146 @@
+# inventory/forecasting.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import InventoryItem, UsageLog, JobCursor, ItemDailyUsage, StockForecast, WorkerDailyUsage
+
+CURSOR_NAME = "stock_forecast"
+DEFAULT_WINDOW_DAYS = 30
+# longer than any approval transaction (see _fold_approved_logs)
+COMMIT_LAG = timedelta(minutes=5)
+
+
+def _new_approved_logs(cursor):
+    """Approved logs past the cursor, keyset-ordered by (approved_at, id)"""
+    logs = UsageLog.objects.filter(is_approved=True, approved_at__isnull=False)
+    if cursor.last_timestamp is not None:
+        logs = logs.filter(
+            Q(approved_at__gt=cursor.last_timestamp) |
+            Q(approved_at=cursor.last_timestamp, id__gt=cursor.last_id)
+        )
+    return logs
+
+
+def _add_to_buckets(model, totals, key_fields, candidates):
+    """Add `totals` ({key tuple: qty}) to existing daily buckets, creating missing ones"""
+    existing = {tuple(getattr(b, f) for f in key_fields): b for b in candidates}
+
+    to_create, to_update = [], []
+    for key, qty in totals.items():
+        bucket = existing.get(key)
+        if bucket is None:
+            to_create.append(model(quantity=qty, **dict(zip(key_fields, key))))
+        else:
+            bucket.quantity += qty
+            to_update.append(bucket)
+
+    model.objects.bulk_create(to_create, batch_size=1000)
+    model.objects.bulk_update(to_update, ['quantity'], batch_size=1000)
+
+
+def _fold_approved_logs(cursor):
+    """
+    Fold logs approved after `cursor` and at least COMMIT_LAG ago into the
+    daily tables and move the cursor to that bound. Returns the number of
+    (item, day) buckets touched.
+    """
+    # approved_at is stamped inside the approval transaction, so a log can
+    # commit after one with a later stamp; only logs older than any running
+    # approval are final
+    bound = timezone.now() - COMMIT_LAG
+    logs = _new_approved_logs(cursor).filter(approved_at__lte=bound)
+
+    worker_totals = {
+        (row['worker_id'], row['item_id'], row['day']): row['qty']
+        for row in logs.annotate(day=TruncDate('approved_at'))
+                       .values('worker_id', 'item_id', 'day')
+                       .annotate(qty=Sum('quantity_used'))
+    }
+    totals = {}
+    for (_, item_id, day), qty in worker_totals.items():
+        totals[(item_id, day)] = totals.get((item_id, day), 0) + qty
+
+    item_ids = {item_id for item_id, _ in totals}
+    days = {day for _, day in totals}
+    _add_to_buckets(
+        ItemDailyUsage, totals, ('item_id', 'day'),
+        ItemDailyUsage.objects.filter(item_id__in=item_ids, day__in=days),
+    )
+    _add_to_buckets(
+        WorkerDailyUsage, worker_totals, ('worker_id', 'item_id', 'day'),
+        WorkerDailyUsage.objects.filter(item_id__in=item_ids, day__in=days),
+    )
+
+    # logs stamped exactly at the bound were folded too
+    cursor.last_timestamp = bound
+    cursor.last_id = logs.filter(approved_at=bound).order_by('-id').values_list('id', flat=True).first() or 0
+    cursor.save(update_fields=['last_timestamp', 'last_id', 'updated_at'])
+    return len(totals)
+
+
+def rollup_daily_usage():
+    """
+    Fold approved logs since the last run into ItemDailyUsage and
+    WorkerDailyUsage. Returns the number of (item, day) buckets touched.
+    """
+    with transaction.atomic():
+        cursor, _ = JobCursor.objects.select_for_update().get_or_create(name=CURSOR_NAME)
+        return _fold_approved_logs(cursor)
+
+
+def rebuild_daily_usage():
+    """
+    Recompute ItemDailyUsage and WorkerDailyUsage from UsageLog, e.g. after
+    logs were edited or deleted. Returns the number of (item, day) buckets.
+    """
+    with transaction.atomic():
+        cursor, _ = JobCursor.objects.select_for_update().get_or_create(name=CURSOR_NAME)
+        ItemDailyUsage.objects.all().delete()
+        WorkerDailyUsage.objects.all().delete()
+        cursor.last_timestamp, cursor.last_id = None, 0
+        return _fold_approved_logs(cursor)
+
+
+def refresh_stock_forecasts(window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Roll up new usage, then recompute StockForecast for every item:
+    daily_rate is the mean approved usage over the last `window_days`,
+    days_until_stockout is total_quantity / daily_rate.
+    """
+    rollup_daily_usage()
+
+    now = timezone.now()
+    since = now.date() - timedelta(days=window_days)
+    consumed = dict(
+        ItemDailyUsage.objects.filter(day__gt=since)
+        .values('item_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('item_id', 'total')
+    )
+
+    forecasts = []
+    items = InventoryItem.objects.values_list('id', 'total_quantity', 'reorder_threshold_days')
+    for item_id, stock, threshold in items.iterator():
+        rate = consumed.get(item_id, 0) / window_days
+        days_left = max(stock, 0) / rate if rate > 0 else None
+        low = stock <= 0 or (days_left is not None and days_left <= threshold)
+        forecasts.append(StockForecast(
+            item_id=item_id,
+            daily_rate=rate,
+            days_until_stockout=days_left,
+            is_low_stock=low,
+            computed_at=now,
+        ))
+
+    StockForecast.objects.bulk_create(
+        forecasts,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['item'],
+        update_fields=['daily_rate', 'days_until_stockout', 'is_low_stock', 'computed_at'],
+    )
+    return len(forecasts)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.attendance_archive import archive_month, closed_months
+
+
+class Command(BaseCommand):
+    help = "Roll closed months of Attendance into monthly summaries and remove them from the hot table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months", type=int, default=2,
+            help="Months kept in the Attendance table, including the current one (default 2)",
+        )
+
+    def handle(self, *args, **options):
+        if options["keep_months"] < 1:
+            raise CommandError("--keep-months must be at least 1")
+
+        months = closed_months(options["keep_months"])
+        if not months:
+            self.stdout.write("Nothing to archive")
+            return
+
+        total = 0
+        for month in months:
+            archived = archive_month(month)
+            total += archived
+            if archived:
+                self.stdout.write(f"{month:%Y-%m}: archived {archived} rows")
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} attendance rows"))
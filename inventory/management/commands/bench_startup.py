@@ -0,0 +1,55 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, like a newly forked/respawned gunicorn worker.
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+import backend.wsgi
+t1 = time.perf_counter()
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET'}
+setup_testing_defaults(environ)
+status = []
+body = backend.wsgi.application(environ, lambda s, h, exc_info=None: status.append(s))
+b''.join(body)
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_request": t2 - t1, "status": status[0]}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time-to-first-request of a WSGI worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--path", default="/api/stock/", help="Path of the first request")
+
+    def handle(self, *args, **options):
+        rows = []
+        for _ in range(options["runs"]):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-c", CHILD, options["path"]],
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+            )
+            wall = time.perf_counter() - start
+            if proc.returncode != 0:
+                raise CommandError(proc.stderr.strip())
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            row["total"] = wall
+            rows.append(row)
+
+        self.stdout.write(f"GET {options['path']} -> {rows[0]['status']} ({len(rows)} runs, ms)")
+        for key in ("import", "first_request", "total"):
+            values = [r[key] * 1000 for r in rows]
+            self.stdout.write(
+                f"  {key:<14} min {min(values):7.1f}  median {statistics.median(values):7.1f}"
+                f"  max {max(values):7.1f}"
+            )
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.errors import InventoryError
+from inventory.stock_import import import_stock, iter_csv, iter_json
+
+
+class Command(BaseCommand):
+    help = "Bulk create/update inventory items by name from a CSV or JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (name,total_quantity[,reorder_threshold_days]) or JSON file")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension")
+        parser.add_argument("--dry-run", action="store_true", help="Report the diff without saving")
+        parser.add_argument("--report", help="Write the full diff report to this JSON file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("json" if path.lower().endswith(".json") else "csv")
+
+        try:
+            with open(path, "rb") as f:
+                rows = iter_csv(f) if fmt == "csv" else iter_json(f)
+                report = import_stock(rows, dry_run=options["dry_run"])
+        except OSError as e:
+            raise CommandError(str(e))
+        except InventoryError as e:
+            raise CommandError(f"Import aborted, nothing saved: row {e.details['row']}: {e.message}")
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Invalid {fmt} file: {e}")
+
+        if options["report"]:
+            with open(options["report"], "w") as f:
+                json.dump(report, f, indent=2, default=str)
+
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{len(report['created'])} created, "
+            f"{len(report['updated'])} updated, {report['unchanged']} unchanged"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory.forecasting import rebuild_daily_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily usage rollups (ItemDailyUsage, WorkerDailyUsage) from approved usage logs "
+        "(run after editing or deleting logs, or if the rollups look short)"
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_usage()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} item/day usage buckets"))
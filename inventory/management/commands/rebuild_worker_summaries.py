@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.dashboard import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the member dashboard summaries from usage logs, attendance and locations "
+        "(run after editing or deleting those rows outside the app)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", action="append", help="Only rebuild these workers (repeatable)")
+
+    def handle(self, *args, **options):
+        worker_ids = None
+        if options["username"]:
+            users = dict(User.objects.filter(username__in=options["username"]).values_list("username", "id"))
+            missing = sorted(set(options["username"]) - set(users))
+            if missing:
+                raise CommandError(f"Unknown username(s): {', '.join(missing)}")
+            worker_ids = list(users.values())
+
+        items, workers = rebuild_summaries(worker_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {items} item summaries and {workers} worker summaries"
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from inventory.stock import find_reservation_drift, repair_reservation_drift
+
+
+class Command(BaseCommand):
+    help = "Compare each item's reserved_quantity with its summed assignments and optionally repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rewrite reserved_quantity from assignments")
+
+    def handle(self, *args, **options):
+        drift = find_reservation_drift()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No reservation drift"))
+            return
+
+        for row in drift:
+            self.stdout.write(
+                f"{row['name']} (id={row['id']}): reserved {row['reserved_quantity']}, "
+                f"assigned {row['actual']}, stock {row['total_quantity']}"
+            )
+
+        if not options["fix"]:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} items drifted, rerun with --fix to repair"))
+            return
+
+        fixed = repair_reservation_drift([row["id"] for row in drift])
+        self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} of {len(drift)} items"))
+        if fixed < len(drift):
+            self.stdout.write(self.style.ERROR(
+                f"{len(drift) - fixed} items have more assigned than in stock and need a manual fix"
+            ))
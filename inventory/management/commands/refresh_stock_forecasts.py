@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.forecasting import DEFAULT_WINDOW_DAYS, refresh_stock_forecasts
+
+
+class Command(BaseCommand):
+    help = "Roll up newly approved usage and recompute per-item stockout forecasts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-days", type=int, default=DEFAULT_WINDOW_DAYS,
+            help="Number of trailing days used to compute the consumption rate",
+        )
+
+    def handle(self, *args, **options):
+        count = refresh_stock_forecasts(window_days=options["window_days"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} stock forecasts"))
@@ -0,0 +1,93 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+import inventory.tasks  # noqa: F401  registers the tasks
+from inventory.taskqueue import KEEP_DONE_DAYS, claim, purge_done, requeue_stale, run_task, task_stats
+
+
+def _run(task_row):
+    try:
+        return run_task(task_row)
+    finally:
+        # each pool thread has its own connection; don't leave it open between tasks
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks with a thread pool (--once drains the queue and exits)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Concurrent tasks (default 4)")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls when idle (default 1)")
+        parser.add_argument("--once", action="store_true", help="Exit when no task is due")
+        parser.add_argument("--stats", action="store_true", help="Print per-task counts and timings, then exit")
+        parser.add_argument("--keep-days", type=int, default=KEEP_DONE_DAYS,
+                            help=f"Days to keep finished tasks, purged hourly (default {KEEP_DONE_DAYS})")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for row in task_stats():
+                self.stdout.write(
+                    f"{row['name']:<24} {row['status']:<8} {row['count']:>7}  "
+                    f"avg {row['avg_ms'] or 0:8.1f} ms  max {row['max_ms'] or 0:8.1f} ms"
+                )
+            return
+
+        threads = options["threads"]
+        if threads < 1:
+            raise CommandError("--threads must be at least 1")
+        if options["keep_days"] < 0:
+            raise CommandError("--keep-days cannot be negative")
+
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker} running with {threads} threads")
+        counts = {}
+        running = set()
+        last_requeue = last_purge = 0
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="task") as pool:
+            try:
+                while True:
+                    if time.monotonic() - last_requeue > 60:
+                        requeued = requeue_stale()
+                        if requeued:
+                            self.stdout.write(f"Requeued {requeued} stale tasks")
+                        last_requeue = time.monotonic()
+
+                    if time.monotonic() - last_purge > 3600:
+                        purged = purge_done(options["keep_days"])
+                        if purged:
+                            self.stdout.write(f"Purged {purged} finished tasks")
+                        last_purge = time.monotonic()
+
+                    free = threads - len(running)
+                    claimed = claim(worker, free) if free else []
+                    close_old_connections()
+                    running.update(pool.submit(_run, t) for t in claimed)
+
+                    if not running:
+                        if options["once"]:
+                            break
+                        time.sleep(options["poll"])
+                        continue
+
+                    timeout = None if free == len(claimed) else options["poll"]
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            status = future.result()
+                        except Exception as e:  # e.g. the database went away while saving the result
+                            self.stderr.write(f"Task bookkeeping failed: {e}")
+                            status = "error"
+                        counts[status] = counts.get(status, 0) + 1
+                    running -= done
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping, waiting for running tasks")
+
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "nothing"
+        self.stdout.write(self.style.SUCCESS(f"Ran {summary}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inventory.anomalies import BATCH_SIZE, score_new_usage
+
+
+class Command(BaseCommand):
+    help = "Risk-score usage logs submitted since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Number of logs scored per transaction",
+        )
+
+    def handle(self, *args, **options):
+        count = score_new_usage(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Scored {count} usage logs"))
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# (username, email, password, is_superuser)
+DEFAULT_USERS = [
+    ('admin', 'admin@example.com', 'admin123', True),
+    ('member1', 'member1@example.com', 'member123', False),
+    ('member2', 'member2@example.com', 'member123', False),
+]
+
+
+class Command(BaseCommand):
+    help = "Create the default admin and member accounts if they don't exist (safe to rerun)"
+
+    def handle(self, *args, **options):
+        existing = set(
+            User.objects.filter(username__in=[u[0] for u in DEFAULT_USERS])
+            .values_list('username', flat=True)
+        )
+
+        created = []
+        with transaction.atomic():
+            for username, email, password, is_superuser in DEFAULT_USERS:
+                if username in existing:
+                    continue
+                if is_superuser:
+                    User.objects.create_superuser(username, email, password)
+                else:
+                    User.objects.create_user(username, email, password)
+                created.append(username)
+
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Created users: {', '.join(created)}"))
+        else:
+            self.stdout.write("Default users already exist")
@@ -0,0 +1,24 @@
+# inventory/middleware.py
+import re
+import uuid
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+_VALID_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+
+class RequestIdMiddleware:
+    """
+    Tag each request with `request.request_id`, taken from a well-formed
+    X-Request-ID header (e.g. set by the proxy) or generated, and echo it
+    back in the response so audit entries can be matched to client calls.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.META.get(REQUEST_ID_HEADER, '')
+        request.request_id = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex
+        response = self.get_response(request)
+        response['X-Request-ID'] = request.request_id
+        return response
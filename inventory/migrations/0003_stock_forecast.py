@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_approved_at(apps, schema_editor):
+    UsageLog = apps.get_model('inventory', 'UsageLog')
+    UsageLog.objects.filter(is_approved=True, approved_at__isnull=True).update(approved_at=F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_couriershipment_courieritem_workerlocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_threshold_days',
+            field=models.IntegerField(default=7),
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='approved_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_approved_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_rate', models.FloatField(default=0)),
+                ('days_until_stockout', models.FloatField(blank=True, null=True)),
+                ('is_low_stock', models.BooleanField(db_index=True, default=False)),
+                ('computed_at', models.DateTimeField()),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='inventory.inventoryitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ItemDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='inventory.inventoryitem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('item', 'day'), name='unique_item_daily_usage')],
+            },
+        ),
+    ]
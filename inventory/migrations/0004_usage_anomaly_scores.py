@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemUsageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('total_sq', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorkerItemUsageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('total_sq', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='risk_reasons',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='risk_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='workerlocation',
+            index=models.Index(fields=['worker', '-timestamp'], name='workerloc_worker_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='itemusagestats',
+            name='item',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage_stats', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='workeritemusagestats',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='workeritemusagestats',
+            name='worker',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='workeritemusagestats',
+            constraint=models.UniqueConstraint(fields=('worker', 'item'), name='unique_worker_item_usage_stats'),
+        ),
+    ]
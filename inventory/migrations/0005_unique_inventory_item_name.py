@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_names(apps, schema_editor):
+    # keep the oldest item's name, suffix the others with their id
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    duplicates = (InventoryItem.objects.values('name')
+                  .annotate(n=Count('id')).filter(n__gt=1).values_list('name', flat=True))
+    for name in list(duplicates):
+        for item in InventoryItem.objects.filter(name=name).order_by('id')[1:]:
+            item.name = f"{name[:190]} ({item.id})"
+            item.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_usage_anomaly_scores'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+    ]
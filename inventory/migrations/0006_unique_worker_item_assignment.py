@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_assignments(apps, schema_editor):
+    # assignments are overwritten on every assign, so the newest row is current
+    AssignedItem = apps.get_model('inventory', 'AssignedItem')
+    latest = (AssignedItem.objects.values('worker_id', 'item_id')
+              .annotate(keep=Max('id')).values_list('keep', flat=True))
+    AssignedItem.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_unique_inventory_item_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='assigneditem',
+            constraint=models.UniqueConstraint(fields=('worker', 'item'), name='unique_worker_item_assignment'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:50
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_reserved_quantity(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    AssignedItem = apps.get_model('inventory', 'AssignedItem')
+
+    reserved = (AssignedItem.objects.values('item_id')
+                .annotate(total=Sum('assigned_quantity')).values_list('item_id', 'total'))
+    items = InventoryItem.objects.in_bulk([item_id for item_id, _ in reserved])
+    for item_id, total in reserved:
+        item = items[item_id]
+        # the old assign endpoints never checked stock; cap the reservation so
+        # the constraint applies. `reconcile_reservations` reports the items
+        # left with more assigned than in stock.
+        item.reserved_quantity = max(0, min(total, item.total_quantity))
+    InventoryItem.objects.bulk_update(items.values(), ['reserved_quantity'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_unique_worker_item_assignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reserved_quantity',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reserved_quantity, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved_quantity__gte', 0), ('reserved_quantity__lte', models.F('total_quantity'))), name='reserved_within_total_quantity'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_reserved_quantity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usagelog',
+            index=models.Index(fields=['-timestamp'], name='usagelog_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usagelog',
+            index=models.Index(fields=['is_approved', '-timestamp'], name='usagelog_approved_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workerlocation',
+            index=models.Index(fields=['-timestamp'], name='workerloc_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_admin_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('check_in', models.DateTimeField(blank=True, null=True)),
+                ('check_out', models.DateTimeField(blank=True, null=True)),
+                ('check_in_lat', models.FloatField(blank=True, null=True)),
+                ('check_in_lng', models.FloatField(blank=True, null=True)),
+                ('check_out_lat', models.FloatField(blank=True, null=True)),
+                ('check_out_lng', models.FloatField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='attendance_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_attendance_user_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('days_present', models.IntegerField(default=0)),
+                ('worked_seconds', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='attendance_summary_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='unique_attendance_summary_user_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usagelog',
+            name='photo_duplicate',
+            field=models.CharField(blank=True, choices=[('exact', 'Exact duplicate'), ('near', 'Near duplicate')], default='', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='PhotoFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('phash', models.BigIntegerField(blank=True, null=True)),
+                ('phash_b0', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('phash_b1', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('phash_b2', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('phash_b3', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('near_duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.photofingerprint')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usagelog',
+            name='photo_fingerprint',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='usage_logs', to='inventory.photofingerprint'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_worker_daily_usage(apps, schema_editor):
+    # only logs the stock_forecast rollup has already folded into
+    # ItemDailyUsage; later ones are picked up by its next run
+    JobCursor = apps.get_model('inventory', 'JobCursor')
+    UsageLog = apps.get_model('inventory', 'UsageLog')
+    WorkerDailyUsage = apps.get_model('inventory', 'WorkerDailyUsage')
+
+    cursor = JobCursor.objects.filter(name='stock_forecast').first()
+    if cursor is None or cursor.last_timestamp is None:
+        return
+
+    logs = UsageLog.objects.filter(is_approved=True, approved_at__isnull=False).filter(
+        Q(approved_at__lt=cursor.last_timestamp) |
+        Q(approved_at=cursor.last_timestamp, id__lte=cursor.last_id)
+    )
+    rows = (
+        logs.annotate(day=TruncDate('approved_at'))
+        .values('worker_id', 'item_id', 'day')
+        .annotate(qty=Sum('quantity_used'))
+    )
+    WorkerDailyUsage.objects.bulk_create(
+        (WorkerDailyUsage(worker_id=r['worker_id'], item_id=r['item_id'], day=r['day'], quantity=r['qty'])
+         for r in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_worker_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worker_daily_usage', to='inventory.inventoryitem')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'item'], name='workerdaily_day_item_idx')],
+                'constraints': [models.UniqueConstraint(fields=('worker', 'item', 'day'), name='unique_worker_daily_usage')],
+            },
+        ),
+        migrations.RunPython(backfill_worker_daily_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_task_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_name', models.CharField(blank=True, max_length=150)),
+                ('action', models.CharField(choices=[('stock.create', 'Stock created'), ('stock.update', 'Stock updated'), ('stock.delete', 'Stock deleted'), ('stock.import', 'Stock imported'), ('assign', 'Assignment set'), ('assign.bulk', 'Bulk assignment'), ('usage.approve', 'Usage approved')], max_length=30)),
+                ('item_name', models.CharField(blank=True, max_length=200)),
+                ('quantity_before', models.IntegerField(blank=True, null=True)),
+                ('quantity_after', models.IntegerField(blank=True, null=True)),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('request_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.inventoryitem')),
+                ('worker', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='audit_created_idx'), models.Index(fields=['action', '-created_at'], name='audit_action_idx'), models.Index(fields=['item', '-created_at'], name='audit_item_idx'), models.Index(fields=['actor_name', '-created_at'], name='audit_actor_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_audit_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_action_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_item_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_actor_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at'], name='audit_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', '-id'], name='audit_action_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['item', '-id'], name='audit_item_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor_name', '-id'], name='audit_actor_id_idx'),
+        ),
+    ]
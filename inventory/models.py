@@ -1,15 +1,32 @@
 # E:\study\worker_inventory\worker_inventory_backend\inventory\models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class InventoryItem(models.Model):
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, unique=True)
     total_quantity = models.IntegerField(default=0)
+    # sum of AssignedItem.assigned_quantity, kept in step by every assign/approve path
+    reserved_quantity = models.IntegerField(default=0)
+    reorder_threshold_days = models.IntegerField(default=7)
 
     def __str__(self):
         return self.name
 
+    @property
+    def available_quantity(self):
+        return self.total_quantity - self.reserved_quantity
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(reserved_quantity__gte=0) &
+                          models.Q(reserved_quantity__lte=models.F('total_quantity')),
+                name='reserved_within_total_quantity',
+            ),
+        ]
+
 
 class AssignedItem(models.Model):
     worker = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -19,18 +36,62 @@ class AssignedItem(models.Model):
     def __str__(self):
         return f"{self.worker.username} - {self.item.name}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'item'], name='unique_worker_item_assignment'),
+        ]
+
+
+class PhotoFingerprint(models.Model):
+    """
+    One row per distinct uploaded photo (by SHA-256). The dHash is also split
+    into 16-bit bands so near duplicates can be found with indexed lookups.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    phash = models.BigIntegerField(null=True, blank=True)
+    phash_b0 = models.IntegerField(null=True, blank=True, db_index=True)
+    phash_b1 = models.IntegerField(null=True, blank=True, db_index=True)
+    phash_b2 = models.IntegerField(null=True, blank=True, db_index=True)
+    phash_b3 = models.IntegerField(null=True, blank=True, db_index=True)
+    near_duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256[:12]
+
 
 class UsageLog(models.Model):
+    DUPLICATE_CHOICES = [
+        ('exact', 'Exact duplicate'),
+        ('near', 'Near duplicate'),
+    ]
+
     worker = models.ForeignKey(User, on_delete=models.CASCADE)
     item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
     quantity_used = models.IntegerField()
     photo = models.ImageField(upload_to="usage_photos/")
+    photo_fingerprint = models.ForeignKey(
+        PhotoFingerprint, on_delete=models.SET_NULL, null=True, blank=True, related_name='usage_logs'
+    )
+    photo_duplicate = models.CharField(max_length=10, choices=DUPLICATE_CHOICES, blank=True, default='')
     is_approved = models.BooleanField(default=False)
+    approved_at = models.DateTimeField(null=True, blank=True, db_index=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    risk_score = models.FloatField(null=True, blank=True, db_index=True)
+    risk_reasons = models.CharField(max_length=200, blank=True, default='')
 
     def __str__(self):
         return f"{self.worker.username} used {self.quantity_used} of {self.item.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp'], name='usagelog_ts_idx'),
+            models.Index(fields=['is_approved', '-timestamp'], name='usagelog_approved_ts_idx'),
+        ]
+
 
 class CourierShipment(models.Model):
     STATUS_CHOICES = [
@@ -74,11 +135,19 @@ class WorkerLocation(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp'], name='workerloc_ts_idx'),
+            models.Index(fields=['worker', '-timestamp'], name='workerloc_worker_ts_idx'),
+        ]
 
 
 class Attendance(models.Model):
+    """
+    One row per user per day. Only open months live here; closed months are
+    rolled up into AttendanceMonthlySummary by `archive_attendance`.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate)
 
     check_in = models.DateTimeField(null=True, blank=True)
     check_out = models.DateTimeField(null=True, blank=True)
@@ -91,3 +160,221 @@ class Attendance(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.date}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_attendance_user_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
+
+
+class JobCursor(models.Model):
+    """High-water mark of an incremental batch job, keyed by job name"""
+    name = models.CharField(max_length=100, unique=True)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_timestamp} #{self.last_id}"
+
+
+class ItemDailyUsage(models.Model):
+    """Approved usage per item per day, rolled up from UsageLog"""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='daily_usage')
+    day = models.DateField()
+    quantity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.item.name} - {self.day}: {self.quantity}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'day'], name='unique_item_daily_usage'),
+        ]
+
+
+class WorkerDailyUsage(models.Model):
+    """Approved usage per worker, item and day, rolled up alongside ItemDailyUsage"""
+    worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_usage')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='worker_daily_usage')
+    day = models.DateField()
+    quantity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.worker.username} - {self.item.name} - {self.day}: {self.quantity}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'item', 'day'], name='unique_worker_daily_usage'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'item'], name='workerdaily_day_item_idx'),
+        ]
+
+
+class StockForecast(models.Model):
+    item = models.OneToOneField(InventoryItem, on_delete=models.CASCADE, related_name='forecast')
+    daily_rate = models.FloatField(default=0)
+    days_until_stockout = models.FloatField(null=True, blank=True)
+    is_low_stock = models.BooleanField(default=False, db_index=True)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.item.name} - {self.days_until_stockout} days"
+
+
+class WorkerItemUsageStats(models.Model):
+    """Running count / sum / sum of squares of quantity_used per worker and item"""
+    worker = models.ForeignKey(User, on_delete=models.CASCADE)
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    total_sq = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.worker.username} - {self.item.name} ({self.count} logs)"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'item'], name='unique_worker_item_usage_stats'),
+        ]
+
+
+class ItemUsageStats(models.Model):
+    """Running usage statistics across all workers (peer group) per item"""
+    item = models.OneToOneField(InventoryItem, on_delete=models.CASCADE, related_name='usage_stats')
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    total_sq = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.item.name} ({self.count} logs)"
+
+
+class AttendanceMonthlySummary(models.Model):
+    """Per-user totals for an archived month of Attendance rows"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # first day of the month
+    days_present = models.IntegerField(default=0)
+    worked_seconds = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_attendance_summary_user_month'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='attendance_summary_month_idx'),
+        ]
+
+
+class WorkerItemSummary(models.Model):
+    """Per worker and item usage totals, kept current by the submit/approve paths"""
+    worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='item_summaries')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    pending_quantity = models.IntegerField(default=0)
+    approved_quantity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.worker.username} - {self.item.name}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'item'], name='unique_worker_item_summary'),
+        ]
+
+
+class WorkerSummary(models.Model):
+    """Current-month attendance and last known location per worker"""
+    worker = models.OneToOneField(User, on_delete=models.CASCADE, related_name='summary')
+    month = models.DateField()  # first day of the month the totals belong to
+    days_present = models.IntegerField(default=0)
+    worked_seconds = models.BigIntegerField(default=0)
+    last_latitude = models.FloatField(null=True, blank=True)
+    last_longitude = models.FloatField(null=True, blank=True)
+    last_location_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.worker.username} - {self.month:%Y-%m}"
+
+
+class Task(models.Model):
+    """A unit of background work, run by the run_tasks worker (inventory/taskqueue.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)  # of the last attempt
+
+    def __str__(self):
+        return f"{self.name} #{self.id} - {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_claim_idx'),
+            models.Index(fields=['name', 'status'], name='task_name_status_idx'),
+        ]
+
+
+class AuditLog(models.Model):
+    """
+    Who changed stock or assignments, and how. References are kept without
+    database constraints so entries outlive the rows they describe; names are
+    snapshotted for the same reason.
+    """
+    ACTION_CHOICES = [
+        ('stock.create', 'Stock created'),
+        ('stock.update', 'Stock updated'),
+        ('stock.delete', 'Stock deleted'),
+        ('stock.import', 'Stock imported'),
+        ('assign', 'Assignment set'),
+        ('assign.bulk', 'Bulk assignment'),
+        ('usage.approve', 'Usage approved'),
+    ]
+
+    actor = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False,
+                              null=True, blank=True, related_name='+')
+    actor_name = models.CharField(max_length=150, blank=True)
+    action = models.CharField(max_length=30, choices=ACTION_CHOICES)
+    item = models.ForeignKey(InventoryItem, on_delete=models.DO_NOTHING, db_constraint=False,
+                             null=True, blank=True, related_name='+')
+    item_name = models.CharField(max_length=200, blank=True)
+    worker = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False,
+                               null=True, blank=True, related_name='+')
+    quantity_before = models.IntegerField(null=True, blank=True)
+    quantity_after = models.IntegerField(null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+    request_id = models.CharField(max_length=64, blank=True, db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M} {self.actor_name} {self.action} {self.item_name}"
+
+    class Meta:
+        indexes = [
+            # search() pages on id
+            models.Index(fields=['created_at'], name='audit_created_at_idx'),
+            models.Index(fields=['action', '-id'], name='audit_action_id_idx'),
+            models.Index(fields=['item', '-id'], name='audit_item_id_idx'),
+            models.Index(fields=['actor_name', '-id'], name='audit_actor_id_idx'),
+        ]
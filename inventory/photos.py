@@ -0,0 +1,138 @@
+# inventory/photos.py
+import hashlib
+import os
+
+from django.db.models import Q
+from PIL import Image, UnidentifiedImageError
+
+from .models import PhotoFingerprint, UsageLog
+
+# dHash bits that may differ for two photos to count as near duplicates.
+# The 64-bit hash is indexed as 4 bands of 16 bits; any hash within 3 bits
+# shares at least one band exactly, so lookups are 4 indexed equality probes.
+NEAR_DUPLICATE_DISTANCE = 3
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def dhash(fileobj, size=8):
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale thumbnail"""
+    with Image.open(fileobj) as img:
+        img = img.convert('L').resize((size + 1, size), Image.Resampling.LANCZOS)
+        pixels = list(img.getdata())
+
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def _to_signed(value):
+    # BigIntegerField is signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def _bands(value):
+    return [(value >> (BAND_BITS * i)) & BAND_MASK for i in range(BANDS)]
+
+
+def find_near_duplicate(phash, exclude_id=None):
+    """Closest stored fingerprint within NEAR_DUPLICATE_DISTANCE bits of `phash`, or None"""
+    bands = _bands(phash)
+    probe = Q()
+    for i, band in enumerate(bands):
+        probe |= Q(**{f'phash_b{i}': band})
+
+    candidates = PhotoFingerprint.objects.filter(probe).only('id', 'phash', 'file_name')
+    if exclude_id is not None:
+        candidates = candidates.exclude(id=exclude_id)
+
+    best, best_distance = None, NEAR_DUPLICATE_DISTANCE + 1
+    for candidate in candidates:
+        distance = bin(_to_unsigned(candidate.phash) ^ phash).count('1')
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    return best
+
+
+def store_photo(field_file, upload):
+    """
+    Save `upload` into an (unsaved) ImageField/FileField under a content-addressed
+    name, reusing the already stored file when identical bytes were uploaded
+    before. Returns (fingerprint, duplicate) where duplicate is '' or 'exact';
+    look-alikes of a new photo are flagged later by flag_near_duplicate().
+    """
+    sha = hashlib.sha256()
+    for chunk in upload.chunks():
+        sha.update(chunk)
+    sha256 = sha.hexdigest()
+
+    existing = PhotoFingerprint.objects.filter(sha256=sha256).first()
+    if existing is not None:
+        field_file.name = existing.file_name
+        return existing, 'exact'
+
+    try:
+        upload.seek(0)
+        phash = dhash(upload)
+    except (UnidentifiedImageError, OSError):
+        phash = None  # not an image we can read; nothing to compare
+    upload.seek(0)
+
+    ext = os.path.splitext(upload.name)[1].lower() or '.jpg'
+    field_file.save(f"{sha256}{ext}", upload, save=False)
+
+    fingerprint, created = PhotoFingerprint.objects.get_or_create(
+        sha256=sha256, defaults={'file_name': field_file.name, **_hash_fields(phash)}
+    )
+    if not created:
+        # the same bytes were uploaded concurrently and stored first by the
+        # other request; drop our (suffixed) copy and point at theirs
+        if field_file.name != fingerprint.file_name:
+            field_file.storage.delete(field_file.name)
+        field_file.name = fingerprint.file_name
+        return fingerprint, 'exact'
+    return fingerprint, ''
+
+
+def flag_near_duplicate(fingerprint_id):
+    """
+    Link a newly stored photo to its closest look-alike and flag the newer
+    one's usage logs 'near'. Returns the look-alike or None.
+    """
+    fingerprint = PhotoFingerprint.objects.get(id=fingerprint_id)
+    if fingerprint.phash is None:
+        return None  # not an image we could read
+    return _link_near_duplicate(fingerprint, _to_unsigned(fingerprint.phash))
+
+
+def _hash_fields(phash):
+    if phash is None:
+        return {}
+    return {'phash': _to_signed(phash), **{f'phash_b{i}': band for i, band in enumerate(_bands(phash))}}
+
+
+def _link_near_duplicate(fingerprint, phash):
+    """
+    Link the newer of `fingerprint` and its closest look-alike to the older and
+    flag the newer one's saved usage logs. The hash must already be stored:
+    of two look-alikes saved concurrently, the one probing last sees the other.
+    """
+    near = find_near_duplicate(phash, exclude_id=fingerprint.id)
+    if near is None:
+        return None
+
+    original_id, copy_id = sorted([fingerprint.id, near.id])
+    if PhotoFingerprint.objects.filter(id=copy_id, near_duplicate_of__isnull=True).update(
+        near_duplicate_of_id=original_id
+    ):
+        UsageLog.objects.filter(photo_fingerprint_id=copy_id, photo_duplicate='').update(photo_duplicate='near')
+    return near
@@ -1,7 +1,10 @@
 # E:\study\worker_inventory\worker_inventory_backend\inventory\serializers.py
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import InventoryItem, AssignedItem, UsageLog, CourierShipment, CourierItem, WorkerLocation
+from .models import (
+    InventoryItem, AssignedItem, UsageLog, CourierShipment, CourierItem, WorkerLocation,
+    StockForecast, AuditLog
+)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,9 +14,12 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class InventoryItemSerializer(serializers.ModelSerializer):
+    available_quantity = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = InventoryItem
         fields = '__all__'
+        read_only_fields = ['reserved_quantity']
 
 
 class AssignedItemSerializer(serializers.ModelSerializer):
@@ -79,4 +85,23 @@ class MemberDetailSerializer(serializers.ModelSerializer):
         location = WorkerLocation.objects.filter(worker=obj).order_by('-timestamp').first()
         if location:
             return WorkerLocationSerializer(location).data
-        return None
\ No newline at end of file
+        return None
+
+
+class StockForecastSerializer(serializers.ModelSerializer):
+    item_id = serializers.IntegerField(source='item.id', read_only=True)
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    total_quantity = serializers.IntegerField(source='item.total_quantity', read_only=True)
+    reorder_threshold_days = serializers.IntegerField(source='item.reorder_threshold_days', read_only=True)
+
+    class Meta:
+        model = StockForecast
+        fields = ['item_id', 'item_name', 'total_quantity', 'reorder_threshold_days',
+                  'daily_rate', 'days_until_stockout', 'is_low_stock', 'computed_at']
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLog
+        fields = ['id', 'created_at', 'action', 'actor_id', 'actor_name', 'item_id', 'item_name',
+                  'worker_id', 'quantity_before', 'quantity_after', 'details', 'request_id']
@@ -0,0 +1,115 @@
+# inventory/stock.py
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .dashboard import add_usage
+from .errors import InventoryError
+from .models import InventoryItem, AssignedItem, UsageLog
+
+
+def approve_usage(log_id):
+    """
+    Approve a UsageLog: deduct the used quantity from the worker's assignment,
+    the item's stock and its reservation, all under row locks in one
+    transaction. Returns a dict describing the before/after quantities.
+    """
+    with transaction.atomic():
+        try:
+            log = UsageLog.objects.select_for_update().get(id=log_id)
+        except UsageLog.DoesNotExist:
+            raise InventoryError("Log not found", status=404)
+
+        if log.is_approved:
+            raise InventoryError("Log already approved")
+
+        # lock order: log -> item -> assignment, as in assignments.assign_item
+        item = InventoryItem.objects.select_for_update().get(id=log.item_id)
+        try:
+            assigned = AssignedItem.objects.select_for_update().get(worker_id=log.worker_id, item=item)
+        except AssignedItem.DoesNotExist:
+            raise InventoryError("Assigned record not found", status=404)
+
+        used = int(log.quantity_used)
+        assigned_before = assigned.assigned_quantity
+        stock_before = item.total_quantity
+
+        # Prevent negative assigned values
+        if used > assigned_before:
+            raise InventoryError("Used quantity cannot exceed assigned quantity",
+                                 details={"assigned": assigned_before, "used": used})
+
+        # Prevent negative stock
+        if used > stock_before:
+            raise InventoryError("Stock quantity too low",
+                                 details={"stock": stock_before, "used": used})
+
+        # Reservation drifted below the assignment (e.g. rows edited outside the app)
+        if used > item.reserved_quantity:
+            raise InventoryError("Reserved stock out of sync, run reconcile_reservations",
+                                 details={"reserved": item.reserved_quantity, "used": used})
+
+        log.is_approved = True
+        log.approved_at = timezone.now()
+        log.save(update_fields=["is_approved", "approved_at"])
+
+        AssignedItem.objects.filter(id=assigned.id).update(
+            assigned_quantity=F('assigned_quantity') - used
+        )
+        # the used quantity leaves the worker's assignment, so it is no longer reserved
+        InventoryItem.objects.filter(id=item.id).update(
+            total_quantity=F('total_quantity') - used,
+            reserved_quantity=F('reserved_quantity') - used,
+        )
+        add_usage(log.worker_id, item.id, pending=-used, approved=used)
+
+    return {
+        "log": log,
+        "item": item,
+        "used": used,
+        "assigned_before": assigned_before,
+        "assigned_after": assigned_before - used,
+        "stock_before": stock_before,
+        "stock_after": stock_before - used,
+    }
+
+
+def _actual_reserved():
+    return Coalesce(
+        Subquery(
+            AssignedItem.objects.filter(item=OuterRef('pk'))
+            .values('item').annotate(total=Sum('assigned_quantity')).values('total')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def find_reservation_drift():
+    """Items whose reserved_quantity differs from their summed assignments, in one query"""
+    return list(
+        InventoryItem.objects.annotate(actual=_actual_reserved())
+        .exclude(reserved_quantity=F('actual'))
+        .values('id', 'name', 'total_quantity', 'reserved_quantity', 'actual')
+        .order_by('id')
+    )
+
+
+def repair_reservation_drift(item_ids):
+    """
+    Recompute reserved_quantity from assignments for `item_ids` in one UPDATE,
+    skipping items whose assignments exceed their stock (those need a manual
+    stock or assignment fix). Returns the number of items repaired.
+    """
+    with transaction.atomic():
+        fixable = (
+            InventoryItem.objects.select_for_update()
+            .filter(id__in=item_ids)
+            .annotate(actual=_actual_reserved())
+            .filter(actual__lte=F('total_quantity'))
+            .values_list('id', flat=True)
+        )
+        return InventoryItem.objects.filter(id__in=list(fixable)).update(
+            reserved_quantity=_actual_reserved()
+        )
@@ -0,0 +1,134 @@
+# inventory/stock_import.py
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .errors import InventoryError
+from .models import InventoryItem
+
+CHUNK_SIZE = 1000
+FIELDS = ['total_quantity', 'reorder_threshold_days']
+
+
+def _row_error(row, message):
+    return InventoryError(message, {"row": row})
+
+
+def iter_csv(fileobj):
+    """Yield rows from a CSV file with a header line (name,total_quantity[,reorder_threshold_days])"""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+    yield from csv.DictReader(fileobj)
+
+
+def iter_json(data):
+    """Accept a list of rows or {"items": [...]}; raw bytes/str/file are decoded first"""
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, (bytes, str)):
+        data = json.loads(data)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise _row_error(0, "expected a list of items")
+    yield from data
+
+
+def _clean(row_no, row):
+    if not isinstance(row, dict):
+        raise _row_error(row_no, "expected an object")
+
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise _row_error(row_no, "name required")
+    if len(name) > 200:
+        raise _row_error(row_no, "name longer than 200 characters")
+
+    values = {}
+    for field in FIELDS:
+        raw = row.get(field)
+        if raw is None or raw == '':
+            if field == 'total_quantity':
+                raise _row_error(row_no, "total_quantity required")
+            continue
+        try:
+            values[field] = int(raw)
+        except (TypeError, ValueError):
+            raise _row_error(row_no, f"{field} must be an integer")
+        if values[field] < 0:
+            raise _row_error(row_no, f"{field} cannot be negative")
+    return name, values
+
+
+def _apply_chunk(chunk, report):
+    existing = {
+        item.name: item
+        for item in InventoryItem.objects.select_for_update().filter(name__in=[name for _, name, _ in chunk])
+    }
+
+    changed = []
+    for row_no, name, values in chunk:
+        item = existing.get(name)
+        if item is None:
+            changed.append(InventoryItem(name=name, **values))
+            report['created'].append(name)
+            continue
+
+        diff = {
+            field: {"before": getattr(item, field), "after": value}
+            for field, value in values.items()
+            if getattr(item, field) != value
+        }
+        if not diff:
+            report['unchanged'] += 1
+            continue
+        if values.get('total_quantity', item.total_quantity) < item.reserved_quantity:
+            raise _row_error(
+                row_no, f"total_quantity below the {item.reserved_quantity} assigned to workers"
+            )
+        for field, value in values.items():
+            setattr(item, field, value)
+        changed.append(item)
+        report['updated'].append({"name": name, **diff})
+
+    # fields missing from a row keep the model default on insert and the
+    # loaded value on update, so every field can go in update_fields
+    InventoryItem.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=FIELDS,
+    )
+
+
+def import_stock(rows, dry_run=False, chunk_size=CHUNK_SIZE):
+    """
+    Upsert InventoryItem rows by name, streaming `rows` in chunks inside one
+    transaction. Any invalid row aborts the whole import with InventoryError
+    (details carry the offending row number).
+    Returns {"created": [...], "updated": [...], "unchanged": n}.
+    """
+    report = {"created": [], "updated": [], "unchanged": 0}
+    seen = set()
+
+    with transaction.atomic():
+        chunk = []
+        for row_no, row in enumerate(rows, start=1):
+            name, values = _clean(row_no, row)
+            if name in seen:
+                raise _row_error(row_no, f"duplicate name '{name}'")
+            seen.add(name)
+
+            chunk.append((row_no, name, values))
+            if len(chunk) >= chunk_size:
+                _apply_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            _apply_chunk(chunk, report)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return report
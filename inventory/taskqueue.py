@@ -0,0 +1,158 @@
+# inventory/taskqueue.py
+import logging
+import random
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Subquery
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 5      # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 3600
+STALE_AFTER = 600     # seconds a running task may hold its lock before it is requeued
+KEEP_DONE_DAYS = 7    # days finished tasks are kept for task_stats before purge_done() deletes them
+PURGE_BATCH = 5000
+
+_registry = {}
+
+
+def task(name=None, max_attempts=5):
+    """
+    Register a function as a background task. Payloads are JSON, so arguments
+    must be JSON-serialisable keyword arguments. Enqueue with `func.delay(**kwargs)`.
+    """
+    def register(func):
+        task_name = name or func.__name__
+        _registry[task_name] = func
+
+        def delay(**payload):
+            return enqueue(task_name, payload, max_attempts=max_attempts)
+
+        func.task_name = task_name
+        func.delay = delay
+        return func
+    return register
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=5):
+    """
+    Queue `name` to run with `payload`. Inside a transaction the task only
+    becomes visible to workers on commit, together with the data it refers to.
+    """
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(worker, limit):
+    """
+    Lock up to `limit` due tasks for `worker` and mark them running. On
+    Postgres concurrent workers skip each other's rows (FOR UPDATE SKIP
+    LOCKED). Without SKIP LOCKED (SQLite) the claim is a single
+    UPDATE ... WHERE id IN (SELECT ... LIMIT n), which the database
+    serialises; either way the per-claim token identifies our rows.
+    """
+    token = f"{worker}:{uuid.uuid4().hex[:8]}"
+    now = timezone.now()
+    due = Task.objects.filter(status='pending', run_after__lte=now).order_by('run_after', 'id')
+    mark_running = {
+        'status': 'running', 'locked_by': token, 'locked_at': now, 'started_at': now,
+        'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            if not ids:
+                return []
+            Task.objects.filter(id__in=ids).update(**mark_running)
+    else:
+        if not Task.objects.filter(id__in=Subquery(due.values('id')[:limit])).update(**mark_running):
+            return []
+    return list(Task.objects.filter(locked_by=token, status='running').order_by('run_after', 'id'))
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`, exponential with jitter"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_task(task_row):
+    """Run one claimed task and record its outcome and duration. Returns the final status."""
+    func = _registry.get(task_row.name)
+    started = time.perf_counter()
+    error = None
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {task_row.name!r}")
+        func(**task_row.payload)
+    except Exception:
+        error = traceback.format_exc()
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    now = timezone.now()
+    fields = {'duration_ms': duration_ms, 'locked_by': '', 'locked_at': None}
+    if error is None:
+        fields.update(status='done', finished_at=now, last_error='')
+    elif func is not None and task_row.attempts < task_row.max_attempts:
+        fields.update(status='pending', last_error=error,
+                      run_after=now + timedelta(seconds=backoff(task_row.attempts)))
+    else:
+        fields.update(status='failed', finished_at=now, last_error=error)
+
+    # the token guard drops the result if the task was requeued as stale meanwhile
+    Task.objects.filter(id=task_row.id, locked_by=task_row.locked_by).update(**fields)
+    if error is not None:
+        logger.warning("Task %s #%s attempt %s failed (%s):\n%s",
+                       task_row.name, task_row.id, task_row.attempts, fields['status'], error)
+    return fields['status']
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """Return tasks locked by a worker that died (locked for over `older_than` seconds) to the queue"""
+    now = timezone.now()
+    stale = Task.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=older_than))
+    # a task that keeps killing its worker must not be retried forever
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_at=None, finished_at=now,
+        last_error='Worker stopped while running the task',
+    )
+    return stale.update(status='pending', locked_by='', locked_at=None, run_after=now)
+
+
+def purge_done(keep_days=KEEP_DONE_DAYS):
+    """
+    Delete tasks that succeeded over `keep_days` days ago, in batches so a
+    large backlog doesn't hold one long delete. Failed tasks are kept for
+    inspection. Returns the number deleted.
+    """
+    old = Task.objects.filter(status='done', finished_at__lt=timezone.now() - timedelta(days=keep_days))
+    deleted = 0
+    while True:
+        ids = list(old.values_list('id', flat=True)[:PURGE_BATCH])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(id__in=ids).delete()[0]
+
+
+def task_stats(since=None):
+    """Count and last-attempt timing (ms) per task name and status"""
+    tasks = Task.objects.all()
+    if since is not None:
+        tasks = tasks.filter(created_at__gte=since)
+    return list(
+        tasks.values('name', 'status')
+        .annotate(count=Count('id'), avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms'))
+        .order_by('name', 'status')
+    )
@@ -0,0 +1,10 @@
+# inventory/tasks.py
+# Background tasks run by `manage.py run_tasks` (see inventory/taskqueue.py).
+from .photos import flag_near_duplicate
+from .taskqueue import task
+
+
+@task(name="flag_near_duplicate_photo")
+def flag_near_duplicate_task(fingerprint_id):
+    """Look for an earlier look-alike of a newly stored usage photo"""
+    flag_near_duplicate(fingerprint_id)
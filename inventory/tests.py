@@ -1,3 +1,638 @@
-from django.test import TestCase
+import io
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import analytics, audit
+from .admin import AssignedItemAdmin, InventoryItemAdmin, UsageLogAdmin, WorkerLocationAdmin
+from .anomalies import score_new_usage
+from .assignments import assign_item, bulk_assign, expand_matrix
+from .attendance_archive import archive_month, closed_months
+from .dashboard import rebuild_summaries
+from .errors import InventoryError
+from .analytics import item_report
+from .forecasting import CURSOR_NAME, rebuild_daily_usage, rollup_daily_usage
+from .models import (
+    AssignedItem, Attendance, AttendanceMonthlySummary, AuditLog, InventoryItem, ItemDailyUsage, ItemUsageStats, JobCursor, PhotoFingerprint, Task, UsageLog,
+    WorkerDailyUsage, WorkerItemUsageStats,
+    WorkerItemSummary, WorkerLocation, WorkerSummary,
+)
+from .photos import store_photo
+from .serializers import MemberDetailSerializer
+from .stock import approve_usage
+from .stock_import import import_stock
+from .throttling import coalesce_get
+from .taskqueue import claim, enqueue, purge_done, run_task, task
+
+
+class AccountingTestBase(TestCase):
+    def setUp(self):
+        self.worker = User.objects.create_user('worker', password='x')
+        self.other = User.objects.create_user('other', password='x')
+        self.item = InventoryItem.objects.create(name='Cable', total_quantity=10)
+
+    def reserved(self, item=None):
+        return InventoryItem.objects.get(id=(item or self.item).id).reserved_quantity
+
+
+class AssignItemTests(AccountingTestBase):
+    def test_assign_reserves_the_difference(self):
+        assign_item(self.worker, self.item, 4)
+        self.assertEqual(self.reserved(), 4)
+
+        assigned = assign_item(self.worker, self.item, 6)
+        self.assertEqual(assigned.previous_quantity, 4)
+        self.assertEqual(self.reserved(), 6)
+
+    def test_assign_beyond_available_stock_fails(self):
+        assign_item(self.worker, self.item, 8)
+        with self.assertRaises(InventoryError) as ctx:
+            assign_item(self.other, self.item, 3)
+        self.assertEqual(ctx.exception.details["available"], 2)
+        self.assertEqual(self.reserved(), 8)
+
+    def test_assign_zero_releases_the_reservation(self):
+        assign_item(self.worker, self.item, 5)
+        assign_item(self.worker, self.item, 0)
+        self.assertEqual(self.reserved(), 0)
+
+    def test_admin_delete_releases_the_reservation(self):
+        assign_item(self.worker, self.item, 5)
+        assigned = AssignedItem.objects.get(worker=self.worker, item=self.item)
+        request = RequestFactory().post('/')
+        request.user = User.objects.create_superuser('admin', password='x')
+
+        AssignedItemAdmin(AssignedItem, site).delete_model(request, assigned)
+        self.assertFalse(AssignedItem.objects.filter(id=assigned.id).exists())
+        self.assertEqual(self.reserved(), 0)
+
+
+class InventoryItemAdminTests(AccountingTestBase):
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().post('/')
+        self.request.user = User.objects.create_superuser('admin', password='x')
+        self.request._messages = CookieStorage(self.request)
+        self.admin = InventoryItemAdmin(InventoryItem, site)
+
+    def test_save_keeps_the_reservation_made_after_the_form_loaded(self):
+        loaded = InventoryItem.objects.get(id=self.item.id)
+        assign_item(self.worker, self.item, 4)
+
+        loaded.total_quantity = 9
+        self.admin.save_model(self.request, loaded, None, change=True)
+        item = InventoryItem.objects.get(id=self.item.id)
+        self.assertEqual((item.total_quantity, item.reserved_quantity), (9, 4))
+
+    def test_save_below_the_current_reservation_is_refused(self):
+        loaded = InventoryItem.objects.get(id=self.item.id)
+        assign_item(self.worker, self.item, 4)
+
+        loaded.total_quantity = 3
+        self.admin.save_model(self.request, loaded, None, change=True)
+        self.assertEqual(InventoryItem.objects.get(id=self.item.id).total_quantity, 10)
+        self.assertIn("assigned to workers", [str(m) for m in self.request._messages][0])
+
+
+class BulkAssignTests(AccountingTestBase):
+    def test_reserves_the_net_change_per_item(self):
+        assign_item(self.worker, self.item, 3)
+        result = bulk_assign([(self.worker.id, self.item.id, 5), (self.other.id, self.item.id, 2)])
+
+        self.assertEqual(result["assigned"], 2)
+        (item, before, after), = result["reserved"]
+        self.assertEqual((item.id, before, after), (self.item.id, 3, 7))
+        self.assertEqual(self.reserved(), 7)
+
+    def test_lowering_an_assignment_frees_stock_for_another(self):
+        assign_item(self.worker, self.item, 10)
+        bulk_assign([(self.worker.id, self.item.id, 4), (self.other.id, self.item.id, 6)])
+        self.assertEqual(self.reserved(), 10)
+
+    def test_matrix_expands_items_for_every_member(self):
+        rows = expand_matrix({"member_ids": [1, 2], "items": [{"item_id": 5, "quantity": 3}]})
+        self.assertEqual(rows, [(1, 5, 3), (2, 5, 3)])
+
+    def test_malformed_matrix_item_is_rejected_not_dropped(self):
+        for items in ([{"item_id": 5, "quantity": 3}, 7], [{"item_id": 5, "quantity": 3}, {"item_id": 6}]):
+            with self.assertRaises(InventoryError) as ctx:
+                expand_matrix({"member_ids": [1, 2], "items": items})
+            self.assertEqual(ctx.exception.details, {"items_index": 1})
+
+    def test_over_stock_writes_nothing(self):
+        with self.assertRaises(InventoryError):
+            bulk_assign([(self.worker.id, self.item.id, 6), (self.other.id, self.item.id, 5)])
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(AssignedItem.objects.exists())
+
+
+class ApproveUsageTests(AccountingTestBase):
+    def setUp(self):
+        super().setUp()
+        assign_item(self.worker, self.item, 5)
+        self.log = UsageLog.objects.create(worker=self.worker, item=self.item, quantity_used=2)
+
+    def test_approve_deducts_assignment_stock_and_reservation(self):
+        result = approve_usage(self.log.id)
+
+        self.assertEqual((result["assigned_after"], result["stock_after"]), (3, 8))
+        item = InventoryItem.objects.get(id=self.item.id)
+        self.assertEqual((item.total_quantity, item.reserved_quantity), (8, 3))
+        self.assertEqual(AssignedItem.objects.get(worker=self.worker, item=self.item).assigned_quantity, 3)
+
+    def test_approve_twice_is_rejected(self):
+        approve_usage(self.log.id)
+        with self.assertRaises(InventoryError):
+            approve_usage(self.log.id)
+        self.assertEqual(InventoryItem.objects.get(id=self.item.id).total_quantity, 8)
+
+    def test_reservation_drift_is_rejected(self):
+        InventoryItem.objects.filter(id=self.item.id).update(reserved_quantity=1)
+        with self.assertRaises(InventoryError) as ctx:
+            approve_usage(self.log.id)
+        self.assertEqual(ctx.exception.details, {"reserved": 1, "used": 2})
+        self.assertFalse(UsageLog.objects.get(id=self.log.id).is_approved)
+
+
+class ImportStockTests(AccountingTestBase):
+    def test_total_below_reserved_is_rejected(self):
+        assign_item(self.worker, self.item, 6)
+        with self.assertRaises(InventoryError) as ctx:
+            import_stock([{"name": "Tape", "total_quantity": 3}, {"name": "Cable", "total_quantity": 5}])
+
+        self.assertEqual(ctx.exception.details["row"], 2)
+        self.assertEqual(InventoryItem.objects.get(id=self.item.id).total_quantity, 10)
+        self.assertFalse(InventoryItem.objects.filter(name="Tape").exists())
+
+    def test_total_at_reserved_is_accepted(self):
+        assign_item(self.worker, self.item, 6)
+        report = import_stock([{"name": "Cable", "total_quantity": 6}])
+        self.assertEqual(len(report["updated"]), 1)
+        self.assertEqual(InventoryItem.objects.get(id=self.item.id).total_quantity, 6)
+
+
+class CreateStockTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='x'))
+
+    def create(self, name, qty):
+        return self.client.post('/api/stock/create/', {"name": name, "total_quantity": qty}, format='json')
+
+    def test_invalid_quantity_is_reported_as_such(self):
+        for qty, error in [(-1, "total_quantity cannot be negative"), ("ten", "total_quantity must be an integer")]:
+            response = self.create("Cable", qty)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], error)
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_duplicate_name_is_rejected(self):
+        self.assertEqual(self.create("Cable", 5).status_code, 201)
+        response = self.create("Cable", 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Item with this name already exists")
+
+
+class DashboardSummaryTests(AccountingTestBase):
+    """The live counters must match what rebuild_summaries() computes from scratch"""
+
+    def summaries(self):
+        # the live path leaves zeroed rows behind where a rebuild writes none
+        items = set(
+            WorkerItemSummary.objects.exclude(pending_quantity=0, approved_quantity=0)
+            .values_list('worker_id', 'item_id', 'pending_quantity', 'approved_quantity')
+        )
+        workers = set(WorkerSummary.objects.values_list('worker_id', 'last_latitude', 'last_longitude', 'last_location_at'))
+        return items, workers
+
+    def assertMatchesRebuild(self):
+        live = self.summaries()
+        rebuild_summaries()
+        self.assertEqual(live, self.summaries())
+
+    def test_admin_usage_edits_keep_totals(self):
+        superuser = User.objects.create_superuser('admin', password='x')
+        request = RequestFactory().post('/')
+        request.user = superuser
+        log = UsageLog(worker=self.worker, item=self.item, quantity_used=3, photo='usage_photos/a.jpg')
+        UsageLogAdmin(UsageLog, site).save_model(request, log, None, change=False)
+        self.assertMatchesRebuild()
+
+        admin = Client()
+        admin.force_login(superuser)
+        url = '/admin/inventory/usagelog/'
+
+        admin.post(f'{url}{log.id}/change/', {'worker': self.other.id, 'item': self.item.id, 'quantity_used': 4})
+        self.assertEqual(UsageLog.objects.get().worker, self.other)
+        self.assertMatchesRebuild()
+
+        admin.post(f'{url}{log.id}/delete/', {'post': 'yes'})
+        self.assertFalse(UsageLog.objects.exists())
+        self.assertMatchesRebuild()
+
+    def test_last_location_is_the_latest_tracked_point_or_check_in_out(self):
+        client = Client()
+        client.post('/api/attendance/check-in/', {"username": "worker", "lat": 1.5, "lng": 2.5},
+                    content_type='application/json')
+        client.post('/api/attendance/check-out/', {"username": "worker", "lat": 3.5, "lng": 4.5},
+                    content_type='application/json')
+        self.assertMatchesRebuild()
+
+        request = RequestFactory().post('/')
+        request.user = User.objects.create_superuser('admin', password='x')
+        location_admin = WorkerLocationAdmin(WorkerLocation, site)
+        tracked = WorkerLocation(worker=self.worker, latitude=9.0, longitude=8.0)
+        location_admin.save_model(request, tracked, None, change=False)
+
+        summary = WorkerSummary.objects.get(worker=self.worker)
+        self.assertEqual((summary.last_latitude, summary.last_longitude), (9.0, 8.0))
+        member = MemberDetailSerializer(self.worker).data["last_location"]
+        self.assertEqual((member["latitude"], member["longitude"]), (9.0, 8.0))
+        self.assertMatchesRebuild()
+
+        location_admin.delete_model(request, tracked)
+        summary = WorkerSummary.objects.get(worker=self.worker)
+        self.assertEqual((summary.last_latitude, summary.last_longitude), (3.5, 4.5))
+
+
+class UsageRollupTests(AccountingTestBase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+
+    def approve(self, qty, approved_at):
+        return UsageLog.objects.create(worker=self.worker, item=self.item, quantity_used=qty,
+                                       is_approved=True, approved_at=approved_at)
+
+    def rollup(self, at):
+        with mock.patch('inventory.forecasting.timezone.now', return_value=at):
+            rollup_daily_usage()
+
+    def rolled_up(self):
+        item = sum(ItemDailyUsage.objects.values_list('quantity', flat=True))
+        worker = sum(WorkerDailyUsage.objects.values_list('quantity', flat=True))
+        self.assertEqual(item, worker)
+        return item
+
+    def test_approvals_inside_the_commit_lag_wait_for_the_next_run(self):
+        self.approve(1, self.now - timedelta(minutes=10))
+        self.approve(2, self.now - timedelta(minutes=1))
+        self.rollup(self.now)
+
+        self.assertEqual(self.rolled_up(), 1)
+        cursor = JobCursor.objects.get(name=CURSOR_NAME)
+        self.assertEqual(cursor.last_timestamp, self.now - timedelta(minutes=5))
+
+        # committed after the first run, stamped before it but after its bound
+        self.approve(4, self.now - timedelta(minutes=2))
+        self.rollup(self.now + timedelta(minutes=10))
+        self.assertEqual(self.rolled_up(), 7)
+
+        self.rollup(self.now + timedelta(minutes=20))
+        self.assertEqual(self.rolled_up(), 7)
+
+    def test_log_stamped_at_the_bound_is_folded_once(self):
+        self.approve(3, self.now - timedelta(minutes=5))
+        self.rollup(self.now)
+        self.rollup(self.now)
+        self.assertEqual(self.rolled_up(), 3)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.approve(1, self.now - timedelta(days=2))
+        self.rollup(self.now - timedelta(days=1))
+        self.approve(2, self.now - timedelta(hours=1))
+        self.rollup(self.now)
+        incremental = set(ItemDailyUsage.objects.values_list('item_id', 'day', 'quantity'))
+
+        with mock.patch('inventory.forecasting.timezone.now', return_value=self.now):
+            rebuild_daily_usage()
+        self.assertEqual(set(ItemDailyUsage.objects.values_list('item_id', 'day', 'quantity')), incremental)
+        self.assertEqual(self.rolled_up(), 3)
+
+    def consumed(self):
+        today = timezone.localdate()
+        report = item_report(today - timedelta(days=7), today, use_cache=False)
+        row = next(r for r in report["items"] if r["item_id"] == self.item.id)
+        self.assertEqual(sum(p["quantity"] for p in row["consumed_by_period"]), row["consumed"])
+        self.assertEqual([c["quantity"] for c in row["top_consumers"]], [row["consumed"]])
+        return row["consumed"]
+
+    def test_item_report_counts_rolled_up_and_newer_logs_once(self):
+        self.approve(1, self.now - timedelta(days=2))
+        self.rollup(self.now - timedelta(days=1))
+        self.approve(2, self.now - timedelta(hours=1))
+        self.approve(4, self.now - timedelta(minutes=1))
+        self.assertEqual(self.consumed(), 7)
+
+        # the 2 moves into the daily tables, the 4 is still inside the commit lag
+        self.rollup(self.now)
+        self.assertEqual(self.rolled_up(), 3)
+        self.assertEqual(self.consumed(), 7)
+
+    def test_item_report_rereads_when_a_rollup_lands_mid_report(self):
+        self.approve(1, self.now - timedelta(days=2))
+        self.approve(2, self.now - timedelta(hours=1))
+        cursor = analytics._cursor
+        calls = []
+
+        def rollup_after_first_read():
+            before = cursor()
+            if not calls:
+                self.rollup(self.now)
+            calls.append(before)
+            return before
+
+        with mock.patch('inventory.analytics._cursor', side_effect=rollup_after_first_read):
+            self.assertEqual(self.consumed(), 3)
+        self.assertEqual(len(calls), 4)
+
+
+class AnomalyScoringTests(AccountingTestBase):
+    def submit(self, qty, worker=None):
+        return UsageLog.objects.create(worker=worker or self.worker, item=self.item, quantity_used=qty)
+
+    def test_each_log_is_scored_and_folded_into_the_stats_once(self):
+        for _ in range(5):
+            self.submit(2)
+        self.submit(3, worker=self.other)
+        self.assertEqual(score_new_usage(batch_size=2), 6)
+        self.assertEqual(score_new_usage(), 0)
+
+        self.assertFalse(UsageLog.objects.filter(risk_score__isnull=True).exists())
+        stats = WorkerItemUsageStats.objects.get(worker=self.worker, item=self.item)
+        self.assertEqual((stats.count, stats.total, stats.total_sq), (5, 10, 20))
+        peers = ItemUsageStats.objects.get(item=self.item)
+        self.assertEqual((peers.count, peers.total), (6, 13))
+
+    def test_outlier_is_flagged_against_the_history_before_it(self):
+        for _ in range(5):
+            self.submit(2)
+        score_new_usage()
+        outlier = self.submit(40)
+        score_new_usage()
+
+        outlier.refresh_from_db()
+        self.assertGreaterEqual(outlier.risk_score, 3)
+        self.assertEqual(outlier.risk_reasons, "above_worker_norm,above_peer_norm")
+
+    def test_log_committed_behind_a_scored_id_is_still_scored(self):
+        # the earlier id committed only after the later log had been scored
+        late = self.submit(1)
+        UsageLog.objects.filter(id=self.submit(1).id).update(risk_score=0)
+
+        self.assertEqual(score_new_usage(), 1)
+        late.refresh_from_db()
+        self.assertIsNotNone(late.risk_score)
+
+
+class AttendanceArchiveTests(AccountingTestBase):
+    def attend(self, user, day, hours=None):
+        check_in = timezone.make_aware(datetime(day.year, day.month, day.day, 8))
+        return Attendance.objects.create(
+            user=user, date=day, check_in=check_in,
+            check_out=check_in + timedelta(hours=hours) if hours is not None else None,
+        )
+
+    def summary(self, user, month):
+        s = AttendanceMonthlySummary.objects.get(user=user, month=month)
+        return s.days_present, s.worked_seconds
+
+    def test_month_is_folded_into_summaries_and_removed(self):
+        self.attend(self.worker, date(2025, 12, 1), hours=8)
+        self.attend(self.worker, date(2025, 12, 31), hours=2)
+        self.attend(self.other, date(2025, 12, 15))  # never checked out
+        next_month = self.attend(self.worker, date(2026, 1, 1), hours=8)
+
+        self.assertEqual(archive_month(date(2025, 12, 1)), 3)
+        self.assertEqual(self.summary(self.worker, date(2025, 12, 1)), (2, 10 * 3600))
+        self.assertEqual(self.summary(self.other, date(2025, 12, 1)), (1, 0))
+        self.assertEqual(list(Attendance.objects.values_list('id', flat=True)), [next_month.id])
+
+    def test_late_rows_are_added_to_the_existing_summary(self):
+        self.attend(self.worker, date(2025, 11, 3), hours=4)
+        archive_month(date(2025, 11, 1))
+        self.attend(self.worker, date(2025, 11, 4), hours=1)
+
+        self.assertEqual(archive_month(date(2025, 11, 1)), 1)
+        self.assertEqual(self.summary(self.worker, date(2025, 11, 1)), (2, 5 * 3600))
+        self.assertEqual(archive_month(date(2025, 11, 1)), 0)
+
+    def test_closed_months_keeps_the_open_ones(self):
+        self.attend(self.worker, date(2025, 11, 20))
+        with mock.patch('inventory.attendance_archive.timezone.localdate', return_value=date(2026, 2, 10)):
+            self.assertEqual(closed_months(keep_months=2), [date(2025, 11, 1), date(2025, 12, 1)])
+            self.assertEqual(closed_months(keep_months=4), [])
+
+
+class CoalesceGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @coalesce_get
+        def view(request):
+            self.calls += 1
+            time.sleep(0.3)
+            return HttpResponse(f"call {self.calls}")
+        self.view = view
+
+    def get(self, path='/poll/?username=w', token='Bearer a'):
+        return self.view(RequestFactory().get(path, HTTP_AUTHORIZATION=token))
+
+    def test_concurrent_identical_gets_run_the_view_once(self):
+        bodies = []
+        threads = [threading.Thread(target=lambda: bodies.append(self.get().content)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(bodies, [b"call 1"] * 5)
+
+    def test_different_callers_and_later_requests_are_not_shared(self):
+        self.get()
+        self.get(token='Bearer b')
+        self.assertEqual(self.get().content, b"call 3")
+
+
+def _photo(name, shade):
+    img = Image.new('L', (90, 80))
+    img.putdata([(x * 3 + y + shade) % 256 for y in range(80) for x in range(90)])
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return SimpleUploadedFile(name, buf.getvalue(), content_type='image/png')
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class StorePhotoTests(TestCase):
+    def store(self, upload, field_file=None):
+        if field_file is None:
+            field_file = UsageLog(quantity_used=1).photo
+        return store_photo(field_file, upload)
+
+    def test_identical_upload_racing_the_first_is_stored_once(self):
+        first = UsageLog(quantity_used=1).photo
+        original, _ = self.store(_photo('a.png', 100), first)
+
+        # the second request missed the sha256 lookup before the first one's insert
+        second = UsageLog(quantity_used=1).photo
+        with mock.patch('inventory.photos.PhotoFingerprint.objects.filter') as lookup:
+            lookup.return_value.first.return_value = None
+            fingerprint, duplicate = self.store(_photo('b.png', 100), second)
+
+        self.assertEqual((fingerprint, duplicate), (original, 'exact'))
+        self.assertEqual(second.name, first.name)
+        _, files = second.storage.listdir('usage_photos')
+        self.assertEqual([f for f in files if f.startswith(original.sha256)], [first.name.split('/')[-1]])
+
+    def submit(self, upload):
+        response = self.client.post('/api/submit-usage/', {
+            "item_id": self.item.id, "quantity_used": 1, "photo": upload,
+        })
+        self.assertEqual(response.status_code, 201)
+        return UsageLog.objects.get(id=response.data["id"])
+
+    def run_queue(self):
+        for queued in claim("test", 10):
+            self.assertEqual(run_task(queued), "done")
+
+    def test_exact_copies_are_flagged_at_submission_and_look_alikes_in_the_background(self):
+        self.item = InventoryItem.objects.create(name='Cable', total_quantity=10)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('worker', password='x'))
+
+        original = self.submit(_photo('a.png', 0))
+        self.assertEqual(original.photo_duplicate, '')
+        self.assertIsNotNone(original.photo_fingerprint.phash)
+
+        copy = self.submit(_photo('b.png', 0))
+        self.assertEqual((copy.photo_fingerprint_id, copy.photo_duplicate), (original.photo_fingerprint_id, 'exact'))
+
+        look_alike = self.submit(_photo('c.png', 1))
+        self.assertNotEqual(look_alike.photo_fingerprint_id, original.photo_fingerprint_id)
+        self.assertEqual(look_alike.photo_duplicate, '')
+
+        self.run_queue()
+        look_alike.refresh_from_db()
+        self.assertEqual(look_alike.photo_duplicate, 'near')
+        self.assertEqual(look_alike.photo_fingerprint.near_duplicate_of_id, original.photo_fingerprint_id)
+        original.refresh_from_db()
+        self.assertEqual(original.photo_duplicate, '')
+
+
+@task(name="test_flaky", max_attempts=2)
+def flaky(fail):
+    if fail:
+        raise RuntimeError("boom")
+
+
+class TaskQueueTests(TestCase):
+    def test_claim_marks_due_tasks_running_once(self):
+        due = enqueue("test_flaky", {"fail": False})
+        enqueue("test_flaky", {"fail": False}, delay=60)
+
+        claimed = claim("w1", 10)
+        self.assertEqual([t.id for t in claimed], [due.id])
+        self.assertEqual((claimed[0].status, claimed[0].attempts), ("running", 1))
+        self.assertEqual(claim("w2", 10), [])
+
+        self.assertEqual(run_task(claimed[0]), "done")
+        self.assertEqual(Task.objects.get(id=due.id).status, "done")
+
+    def test_failure_is_retried_with_backoff_then_fails(self):
+        queued = flaky.delay(fail=True)
+
+        first, = claim("w1", 1)
+        with self.assertLogs('inventory.taskqueue', 'WARNING'):
+            self.assertEqual(run_task(first), "pending")
+        retry = Task.objects.get(id=queued.id)
+        self.assertGreater(retry.run_after, timezone.now())
+        self.assertIn("boom", retry.last_error)
+
+        Task.objects.filter(id=queued.id).update(run_after=timezone.now() - timedelta(seconds=1))
+        second, = claim("w1", 1)
+        self.assertEqual(second.attempts, 2)
+        with self.assertLogs('inventory.taskqueue', 'WARNING'):
+            self.assertEqual(run_task(second), "failed")
+        self.assertEqual(Task.objects.get(id=queued.id).status, "failed")
+
+    def test_purge_done_keeps_recent_and_failed_tasks(self):
+        old = timezone.now() - timedelta(days=8)
+        expired = enqueue("test_flaky")
+        Task.objects.filter(id=expired.id).update(status='done', finished_at=old)
+        failed = enqueue("test_flaky")
+        Task.objects.filter(id=failed.id).update(status='failed', finished_at=old)
+        recent = enqueue("test_flaky")
+        Task.objects.filter(id=recent.id).update(status='done', finished_at=timezone.now())
+
+        self.assertEqual(purge_done(keep_days=7), 1)
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {failed.id, recent.id})
+
+
+@mock.patch('inventory.audit._flusher', object())  # flush explicitly, not from a thread
+class AuditSearchTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().post('/')
+        self.request.user = User.objects.create_superuser('admin', password='x')
+        audit.flush()
+
+    def buffered(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return audit.record(self.request, action)
+
+    def pages(self, limit):
+        seen, cursor = [], None
+        while True:
+            page, cursor = audit.search({'limit': limit, 'cursor': cursor})
+            seen += [log.id for log in page]
+            if cursor is None:
+                return seen
+
+    def test_buffered_entries_keep_their_time_and_page_with_critical_ones(self):
+        first = self.buffered('assign')
+        critical = audit.record(self.request, 'stock.update', critical=True)
+        second = self.buffered('assign.bulk')
+        self.assertIsNone(first.id)
+        recorded_at = first.created_at
+
+        first_page, cursor = audit.search({'limit': 1})  # flushes the buffer
+        self.assertEqual(AuditLog.objects.get(id=first.id).created_at, recorded_at)
+        self.assertLess(recorded_at, critical.created_at)
+
+        # written after the reader took its first page, timestamped before it
+        late = self.buffered('assign')
+        audit.flush()
+
+        rest = self.pages(1)
+        self.assertEqual(len(rest), len(set(rest)))
+        self.assertEqual(sorted(rest, reverse=True), rest)
+        self.assertEqual(set(rest), {critical.id, first.id, second.id, late.id})
+        self.assertEqual([log.id for log in first_page], [rest[1]])
+
+        remaining = [log.id for log in audit.search({'limit': 10, 'cursor': cursor})[0]]
+        self.assertEqual(remaining, rest[2:])
+
+    def test_filters_and_bad_cursor(self):
+        audit.record(self.request, 'stock.update', critical=True)
+        self.buffered('assign')
+        logs, cursor = audit.search({'action': 'stock.'})
+        self.assertEqual([log.action for log in logs], ['stock.update'])
+        self.assertIsNone(cursor)
+
+        with self.assertRaises(InventoryError):
+            audit.search({'cursor': 'not-a-cursor'})
@@ -0,0 +1,131 @@
+# inventory/throttling.py
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per user (or per client + ?username for anonymous requests)
+    and per view `throttle_scope`. A rate of "N/period" allows bursts of N
+    requests, refilled at N per period. Buckets live in the default cache.
+    Function views, which have no throttle_scope, use a subclass setting `scope`.
+    """
+    scope = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.wait_time = None
+
+    def parse_rate(self, rate):
+        num, period = rate.split('/')
+        return int(num), DURATIONS[period[0]]
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None) or self.scope
+
+    def get_cache_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f"user_{request.user.pk}"
+        else:
+            ident = f"anon_{self.get_ident(request)}_{request.query_params.get('username', '')}"
+        return f"throttle_bucket_{scope}_{ident}"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+
+        capacity, period = self.parse_rate(rate)
+        key = self.get_cache_key(request, scope)
+        now = time.time()
+
+        with self._lock:
+            tokens, last = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * capacity / period)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.wait_time = (1 - tokens) * period / capacity
+            cache.set(key, (tokens, now), period)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class AttendanceThrottle(TokenBucketThrottle):
+    scope = 'attendance'
+
+
+# ---------- REQUEST COALESCING ----------
+
+COALESCE_WAIT = 5      # seconds a follower waits for the leader before computing itself
+COALESCE_POLL = 0.05   # seconds between a follower's checks for the leader's response
+
+
+def _replay(result):
+    status, content, headers = result
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def coalesce_get(view):
+    """
+    Single-flight identical concurrent GETs (same path, query and Authorization
+    header) through the default cache: the first request takes a short-lived
+    lock with cache.add() and runs the view, the rest poll for its rendered
+    response. Coalesces across worker processes when the cache is shared
+    (REDIS_URL); with the local-memory fallback only within a process.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+
+        ident = f"{request.get_full_path()}|{request.META.get('HTTP_AUTHORIZATION', '')}"
+        key = "coalesce_" + hashlib.sha256(ident.encode()).hexdigest()
+        flight = uuid.uuid4().hex
+
+        if not cache.add(key, flight, COALESCE_WAIT):
+            # follow the flight in progress; its response is stored under its own id
+            # so a later flight's follower can never be served an older response
+            leader = cache.get(key)
+            deadline = time.monotonic() + COALESCE_WAIT
+            while leader is not None and time.monotonic() < deadline:
+                time.sleep(COALESCE_POLL)
+                # the leader stores its response before releasing the lock
+                running = cache.get(key) == leader
+                result = cache.get(f"{key}_{leader}")
+                if result is not None:
+                    return _replay(result)
+                if not running:
+                    break  # finished without a shareable response
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+            if not response.streaming:
+                cache.set(f"{key}_{flight}", (response.status_code, response.content, list(response.items())),
+                          COALESCE_WAIT)
+            return response
+        finally:
+            if cache.get(key) == flight:  # not yet expired and taken by another flight
+                cache.delete(key)
+
+    return wrapped
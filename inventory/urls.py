@@ -2,10 +2,11 @@
 from django.urls import path
 from . import views
 from .views import (
-    StockListView, StockDetailView,
-    MembersListView, MemberDetailView, AssignItemView,
-    AssignedItemsSimpleView,
-    SubmitUsageView, PendingUsageView, ApproveUsageView, UsageHistoryView
+    StockListView, StockDetailView, StockImportView,
+    MembersListView, MemberDetailView, AssignItemView, BulkAssignView,
+    AssignedItemsSimpleView, WorkerDashboardView,
+    SubmitUsageView, PendingUsageView, ApproveUsageView, UsageHistoryView,
+    StockForecastView, ItemAnalyticsView, AuditLogView
 )
 
 urlpatterns = [
@@ -14,19 +15,31 @@ urlpatterns = [
     path('stock/create/', StockDetailView.as_view()),
     path('stock/<int:item_id>/update/', StockDetailView.as_view()),
     path('stock/<int:item_id>/delete/', StockDetailView.as_view()),
+    path('stock/import/', StockImportView.as_view()),
 
     # Members
     path('members/', MembersListView.as_view()),
     path('members/<int:member_id>/', MemberDetailView.as_view()),
     path('assign/', AssignItemView.as_view(), name='assign_item'),
+    path('assign/bulk/', BulkAssignView.as_view(), name='bulk_assign'),
 
     # Member screens
     path('assigned-items/', AssignedItemsSimpleView.as_view()),
+    path('dashboard/', WorkerDashboardView.as_view()),
     path('submit-usage/', SubmitUsageView.as_view()),
     path('pending-usage/', PendingUsageView.as_view()),
     path('approve-usage/<int:log_id>/', ApproveUsageView.as_view()),
     path('history/', UsageHistoryView.as_view()),
 
+    # Forecasting
+    path('stock/forecast/', StockForecastView.as_view()),
+
+    # Analytics
+    path('analytics/items/', ItemAnalyticsView.as_view()),
+
+    # Audit
+    path('audit/', AuditLogView.as_view()),
+
     path("attendance/check-in/", views.check_in),
     path("attendance/check-out/", views.check_out),
     path("attendance/today/", views.today_attendance),
@@ -1,21 +1,38 @@
 # inventory/views.py
 from rest_framework.views import APIView
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.db.models import F
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-import uuid, os, json
-
-from .models import InventoryItem, AssignedItem, UsageLog, Attendance
+from django.utils.decorators import method_decorator
+import json
+import logging
+from collections import Counter
+
+from .models import InventoryItem, AssignedItem, UsageLog, Attendance, StockForecast
+from . import audit
+from .analytics import item_report, parse_params
+from .assignments import assign_item, bulk_assign, expand_matrix
+from .dashboard import add_usage, record_attendance, worker_dashboard
+from .errors import InventoryError
+from .photos import store_photo
+from .stock import approve_usage
+from .tasks import flag_near_duplicate_task
+from .throttling import AttendanceThrottle, TokenBucketThrottle, coalesce_get
+from .stock_import import import_stock, iter_csv, iter_json
 from .serializers import (
     InventoryItemSerializer, AssignedItemSerializer,
-    UsageLogSerializer, MemberDetailSerializer
+    UsageLogSerializer, MemberDetailSerializer, StockForecastSerializer, AuditLogSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 @csrf_exempt
 def check_in(request):
@@ -49,7 +66,9 @@ def check_in(request):
     attendance.check_in = timezone.now()
     attendance.check_in_lat = lat
     attendance.check_in_lng = lng
-    attendance.save()
+    with transaction.atomic():
+        attendance.save()
+        record_attendance(user.id, today, days_present=1, lat=lat, lng=lng, at=attendance.check_in)
 
     return JsonResponse({"message": "Check-in successful"})
 
@@ -89,12 +108,23 @@ def check_out(request):
     attendance.check_out = timezone.now()
     attendance.check_out_lat = lat
     attendance.check_out_lng = lng
-    attendance.save()
+    worked = attendance.check_out - attendance.check_in if attendance.check_in else None
+    with transaction.atomic():
+        attendance.save()
+        record_attendance(
+            user.id, today,
+            worked_seconds=int(worked.total_seconds()) if worked else 0,
+            lat=lat, lng=lng, at=attendance.check_out,
+        )
 
     return JsonResponse({"message": "Check-out successful"})
 
 
-@csrf_exempt
+@coalesce_get
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([AttendanceThrottle])
 def today_attendance(request):
     username = request.GET.get("username")
     if not username:
@@ -124,8 +154,11 @@ def today_attendance(request):
 #        SIMPLE ASSIGNED ITEMS (Member)
 # ==========================================
 
+@method_decorator(coalesce_get, name='dispatch')
 class AssignedItemsSimpleView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'assigned_items'
 
     def get(self, request):
         worker = request.user
@@ -133,11 +166,23 @@ class AssignedItemsSimpleView(APIView):
         serializer = AssignedItemSerializer(items, many=True)
         return Response(serializer.data)
 
-# ---------- UTILITY ----------
-def unique_filename(filename):
-    base, ext = os.path.splitext(filename)
-    return f"{uuid.uuid4().hex}{ext or '.jpg'}"
+# ==========================================
+#           MEMBER DASHBOARD
+# ==========================================
+
+@method_decorator(coalesce_get, name='dispatch')
+class WorkerDashboardView(APIView):
+    """
+    Member app launch data in one request: assigned items with pending/approved
+    usage totals, this month's attendance and the last known location, read
+    from the per-worker summary rows (see `rebuild_worker_summaries`).
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'dashboard'
 
+    def get(self, request):
+        return Response(worker_dashboard(request.user))
 
 # ==========================================
 #                STOCK (Admin)
@@ -160,28 +205,116 @@ class StockDetailView(APIView):
 
         if not name or qty is None:
             return Response({"error": "name and quantity required"}, status=400)
+        try:
+            qty = int(qty)
+        except (TypeError, ValueError):
+            return Response({"error": "total_quantity must be an integer"}, status=400)
+        if qty < 0:
+            return Response({"error": "total_quantity cannot be negative"}, status=400)
 
-        item = InventoryItem.objects.create(name=name, total_quantity=int(qty))
+        # with the quantity valid, the unique name is the only constraint left to violate
+        try:
+            with transaction.atomic():
+                item = InventoryItem.objects.create(name=name, total_quantity=qty)
+                audit.record(request, 'stock.create', item=item, after=item.total_quantity, critical=True)
+        except IntegrityError:
+            return Response({"error": "Item with this name already exists"}, status=400)
         return Response(InventoryItemSerializer(item).data, status=201)
 
     def put(self, request, item_id):
-        try:
-            item = InventoryItem.objects.get(id=item_id)
-        except InventoryItem.DoesNotExist:
-            return Response({"error": "Not found"}, status=404)
-
-        item.name = request.data.get("name", item.name)
-        item.total_quantity = int(request.data.get("total_quantity", item.total_quantity))
-        item.save()
+        with transaction.atomic():
+            try:
+                item = InventoryItem.objects.select_for_update().get(id=item_id)
+            except InventoryItem.DoesNotExist:
+                return Response({"error": "Not found"}, status=404)
+
+            old_name, old_total = item.name, item.total_quantity
+            item.name = request.data.get("name", item.name)
+            try:
+                item.total_quantity = int(request.data.get("total_quantity", item.total_quantity))
+            except (TypeError, ValueError):
+                return Response({"error": "total_quantity must be an integer"}, status=400)
+            if item.total_quantity < item.reserved_quantity:
+                return Response({
+                    "error": "Stock cannot go below the quantity assigned to workers",
+                    "reserved": item.reserved_quantity
+                }, status=400)
+            try:
+                with transaction.atomic():
+                    item.save(update_fields=["name", "total_quantity"])
+            except IntegrityError:
+                return Response({"error": "Item with this name already exists"}, status=400)
+
+            changes = {"renamed_from": old_name} if item.name != old_name else {}
+            audit.record(request, 'stock.update', item=item, before=old_total,
+                         after=item.total_quantity, critical=True, **changes)
 
         return Response(InventoryItemSerializer(item).data)
 
     def delete(self, request, item_id):
+        with transaction.atomic():
+            try:
+                item = InventoryItem.objects.select_for_update().get(id=item_id)
+            except InventoryItem.DoesNotExist:
+                return Response({"error": "Not found"}, status=404)
+            audit.record(request, 'stock.delete', item=item, before=item.total_quantity, critical=True)
+            item.delete()
+        return Response({"message": "Deleted"})
+
+
+class StockImportView(APIView):
+    """
+    Admin: bulk create/update stock by item name.
+    Accepts a CSV or JSON upload in "file", or a JSON body
+    ([{"name": "Cable", "total_quantity": 50}, ...] or {"items": [...]}).
+    ?dry_run=1 reports the diff without saving.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            is_csv = upload.name.lower().endswith(".csv") or upload.content_type == "text/csv"
+            rows = iter_csv(upload) if is_csv else iter_json(upload)
+        else:
+            rows = iter_json(request.data)
+
+        dry_run = request.query_params.get("dry_run") in ("1", "true")
         try:
-            InventoryItem.objects.get(id=item_id).delete()
-            return Response({"message": "Deleted"})
-        except InventoryItem.DoesNotExist:
-            return Response({"error": "Not found"}, status=404)
+            report = import_stock(rows, dry_run=dry_run)
+        except InventoryError as e:
+            return e.response()
+        except (ValueError, UnicodeDecodeError):
+            return Response({"error": "Invalid file"}, status=400)
+
+        if not dry_run:
+            _audit_import(request, report)
+
+        return Response({
+            "dry_run": dry_run,
+            "created": report["created"],
+            "updated": report["updated"],
+            "unchanged": report["unchanged"],
+        })
+
+
+def _audit_import(request, report):
+    updated = {row["name"]: row for row in report["updated"]}
+    names = list(updated) + report["created"]
+    entries = []
+    for item in InventoryItem.objects.filter(name__in=names).only('id', 'name', 'total_quantity'):
+        row = updated.get(item.name)
+        if row is None:
+            entries.append(audit.entry(request, 'stock.import', item=item, after=item.total_quantity))
+        else:
+            quantity = row.get("total_quantity", {"before": item.total_quantity, "after": item.total_quantity})
+            entries.append(audit.entry(
+                request, 'stock.import', item=item,
+                before=quantity["before"], after=quantity["after"],
+                changes={k: v for k, v in row.items() if k != "name"},
+            ))
+    audit.buffer(entries)
 
 
 # ==========================================
@@ -211,7 +344,8 @@ class MemberDetailView(APIView):
 
     def put(self, request, member_id):
         """
-        Simple assigning (NO stock sync, NO diff logic):
+        Set the member's assigned quantity; the difference is reserved from
+        (or released back to) the item's available stock:
         {
             "item_id": 1,
             "quantity": 20
@@ -240,17 +374,14 @@ class MemberDetailView(APIView):
         except InventoryItem.DoesNotExist:
             return Response({"error": "Item not found"}, status=404)
 
-        # create or update assignment
-        assigned, created = AssignedItem.objects.get_or_create(
-            worker=member,
-            item=item
-        )
-
-        # simple save
-        assigned.assigned_quantity = quantity
-        assigned.save()
+        # create or update assignment, reserving the difference in stock
+        try:
+            assigned = assign_item(member, item, quantity)
+        except InventoryError as e:
+            return e.response()
 
-        print(f"[Assign] Member={member.username}, Item={item.name}, Qty={quantity}")
+        audit.record(request, 'assign', item=item, worker=member,
+                     before=assigned.previous_quantity, after=assigned.assigned_quantity)
 
         return Response({
             "message": "Assigned successfully",
@@ -280,13 +411,50 @@ class AssignItemView(APIView):
         except:
             return Response({"error": "Invalid member or item"}, status=404)
 
-        assigned, created = AssignedItem.objects.get_or_create(worker=member, item=item)
-        assigned.assigned_quantity = int(qty)
-        assigned.save()
+        try:
+            qty = int(qty)
+        except (TypeError, ValueError):
+            return Response({"error": "quantity must be an integer"}, status=400)
+
+        try:
+            assigned = assign_item(member, item, qty)
+        except InventoryError as e:
+            return e.response()
 
+        audit.record(request, 'assign', item=item, worker=member,
+                     before=assigned.previous_quantity, after=assigned.assigned_quantity)
         return Response(AssignedItemSerializer(assigned).data)
 
 
+class BulkAssignView(APIView):
+    """
+    Admin assigns many items to many members in one request:
+    {
+        "member_ids": [3, 4, 5],
+        "items": [{"item_id": 1, "quantity": 20}, {"item_id": 2, "quantity": 5}]
+    }
+    or explicit rows in "assignments": [{"member_id", "item_id", "quantity"}, ...].
+    Existing assignments for the same member/item are overwritten; nothing is
+    written if any item lacks the available stock.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        try:
+            rows = expand_matrix(request.data)
+            result = bulk_assign(rows)
+        except InventoryError as e:
+            return e.response()
+
+        # one entry per item: the change in its reserved (assigned) total
+        pairs = Counter(item_id for _, item_id, _ in rows)
+        audit.buffer([
+            audit.entry(request, 'assign.bulk', item=item, before=before, after=after, pairs=pairs[item.id])
+            for item, before, after in result["reserved"]
+        ])
+        return Response({"message": "Assigned successfully", "assigned": result["assigned"]})
+
+
 # ==========================================
 #               MEMBER SCREENS
 # ==========================================
@@ -308,26 +476,62 @@ class SubmitUsageView(APIView):
         except InventoryItem.DoesNotExist:
             return Response({"error": "Invalid item"}, status=404)
 
-        # make filename unique
-        old = photo.name
-        photo.name = unique_filename(photo.name)
-        print(f"upload: rename {old} → {photo.name}")
+        # optional submission location, used for anomaly scoring
+        try:
+            lat = float(request.data["lat"]) if request.data.get("lat") else None
+            lng = float(request.data["lng"]) if request.data.get("lng") else None
+        except ValueError:
+            return Response({"error": "lat and lng must be numbers"}, status=400)
 
-        log = UsageLog.objects.create(
+        log = UsageLog(
             worker=request.user,
             item=item,
             quantity_used=int(qty),
-            photo=photo,
+            latitude=lat,
+            longitude=lng,
         )
 
-        return Response({"id": log.id, "message": "Uploaded"}, status=201)
+        # content-addressed: identical photos are stored once, look-alikes are
+        # flagged in the background
+        original_name = photo.name
+        log.photo_fingerprint, log.photo_duplicate = store_photo(log.photo, photo)
+        logger.debug("Usage photo %s stored as %s (%s)", original_name, log.photo.name,
+                     log.photo_duplicate or "new")
+        with transaction.atomic():
+            log.save()
+            add_usage(request.user.id, item.id, pending=log.quantity_used)
+            if not log.photo_duplicate:
+                flag_near_duplicate_task.delay(fingerprint_id=log.photo_fingerprint_id)
+
+        return Response({
+            "id": log.id,
+            "message": "Uploaded",
+            "duplicate_photo": log.photo_duplicate or None
+        }, status=201)
 
 
 class PendingUsageView(APIView):
+    """
+    Admin: unapproved usage logs.
+    ?sort=risk orders by the precomputed risk_score (see `score_usage_anomalies`),
+    ?min_risk=<float> keeps only logs scored at or above the given value.
+    """
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        logs = UsageLog.objects.filter(is_approved=False).order_by('-timestamp')
+        logs = UsageLog.objects.filter(is_approved=False)
+
+        min_risk = request.query_params.get("min_risk")
+        if min_risk:
+            try:
+                logs = logs.filter(risk_score__gte=float(min_risk))
+            except ValueError:
+                return Response({"error": "min_risk must be a number"}, status=400)
+
+        if request.query_params.get("sort") == "risk":
+            logs = logs.order_by(F('risk_score').desc(nulls_last=True), '-timestamp')
+        else:
+            logs = logs.order_by('-timestamp')
         return Response(UsageLogSerializer(logs, many=True).data)
 
 
@@ -336,71 +540,101 @@ class ApproveUsageView(APIView):
 
     def post(self, request, log_id):
         try:
-            log = UsageLog.objects.get(id=log_id)
-        except UsageLog.DoesNotExist:
-            return Response({"error": "Log not found"}, status=404)
-
-        worker = log.worker
-        item = log.item
-        used = int(log.quantity_used)
-
-        # 1. Get assigned item
-        try:
-            assigned = AssignedItem.objects.get(worker=worker, item=item)
-        except AssignedItem.DoesNotExist:
-            return Response({"error": "Assigned record not found"}, status=404)
-
-        assigned_before = assigned.assigned_quantity
-        stock_before = item.total_quantity
-
-        # 2. Prevent negative assigned values
-        if used > assigned_before:
-            return Response({
-                "error": "Used quantity cannot exceed assigned quantity",
-                "assigned": assigned_before,
-                "used": used
-            }, status=400)
-
-        # 3. Prevent negative stock
-        if used > stock_before:
-            return Response({
-                "error": "Stock quantity too low",
-                "stock": stock_before,
-                "used": used
-            }, status=400)
-
-        # 4. Approve log
-        log.is_approved = True
-        log.save(update_fields=["is_approved"])
-
-        # 5. Update assigned quantity
-        assigned_after = assigned_before - used
-        assigned.assigned_quantity = assigned_after
-        assigned.save(update_fields=["assigned_quantity"])
-
-        # 6. Update stock quantity
-        stock_after = stock_before - used
-        item.total_quantity = stock_after
-        item.save(update_fields=["total_quantity"])
-
-        print("\n=== APPROVE USAGE ===")
-        print(f"Worker: {worker.username}")
-        print(f"Item: {item.name}")
-        print(f"Used: {used}")
-        print(f"Assigned: {assigned_before} -> {assigned_after}")
-        print(f"Stock: {stock_before} -> {stock_after}")
-        print("=====================\n")
+            with transaction.atomic():
+                result = approve_usage(log_id)
+                audit.record(
+                    request, 'usage.approve', item=result["item"], worker=result["log"].worker,
+                    before=result["stock_before"], after=result["stock_after"], critical=True,
+                    log_id=result["log"].id, used=result["used"],
+                    assigned_before=result["assigned_before"], assigned_after=result["assigned_after"],
+                )
+        except InventoryError as e:
+            return e.response()
+
+        logger.info(
+            "Approved usage #%s: %s used %s %s, assigned %s -> %s, stock %s -> %s",
+            result["log"].id, result["log"].worker.username, result["used"], result["item"].name,
+            result["assigned_before"], result["assigned_after"], result["stock_before"], result["stock_after"],
+        )
 
         return Response({
             "message": "Approved successfully",
-            "assigned_after": assigned_after,
-            "stock_after": stock_after
+            "assigned_after": result["assigned_after"],
+            "stock_after": result["stock_after"]
         })
 
 
+@method_decorator(coalesce_get, name='dispatch')
 class UsageHistoryView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'usage_history'
 
     def get(self, request):
         logs = UsageLog.objects.filter(worker=request.user).order_by('-timestamp')
-        return Response(UsageLogSerializer(logs, many=True).data)
\ No newline at end of file
+        return Response(UsageLogSerializer(logs, many=True).data)
+
+
+# ==========================================
+#           STOCK FORECAST (Admin)
+# ==========================================
+
+class StockForecastView(APIView):
+    """
+    Admin: precomputed stockout forecasts (refreshed by `refresh_stock_forecasts`).
+    ?low_stock=1 returns only items at or below their reorder threshold.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        forecasts = StockForecast.objects.select_related('item')
+        if request.query_params.get("low_stock") in ("1", "true"):
+            forecasts = forecasts.filter(is_low_stock=True)
+        forecasts = forecasts.order_by(F('days_until_stockout').asc(nulls_last=True), 'item__name')
+        return Response(StockForecastSerializer(forecasts, many=True).data)
+
+# ==========================================
+#             ANALYTICS (Admin)
+# ==========================================
+
+class ItemAnalyticsView(APIView):
+    """
+    Admin: per item stock, assigned quantity, approved usage per period and
+    top consumers. Query: ?start=&end= (YYYY-MM-DD, default last 30 days),
+    ?group_by=day|week|month|year, ?item_id=1,2, ?top=5, ?refresh=1 to skip the cache.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            params = parse_params(request.query_params)
+        except InventoryError as e:
+            return e.response()
+
+        refresh = request.query_params.get("refresh") in ("1", "true")
+        return Response(item_report(**params, use_cache=not refresh))
+
+
+# ==========================================
+#               AUDIT (Admin)
+# ==========================================
+
+class AuditLogView(APIView):
+    """
+    Admin: stock and assignment changes, most recently written first.
+    Filters: ?action= (exact, or a prefix like "stock."), ?actor=<username>,
+    ?item_id=, ?worker_id=, ?request_id=, ?since=, ?until= (ISO date/datetime).
+    Pages with ?limit= (max 200) and the returned next_cursor as ?cursor=.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            logs, next_cursor = audit.search(request.query_params)
+        except InventoryError as e:
+            return e.response()
+
+        return Response({
+            "results": AuditLogSerializer(logs, many=True).data,
+            "next_cursor": next_cursor,
+        })